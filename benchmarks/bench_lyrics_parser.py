@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Lyrics parser micro-benchmark
+=============================
+
+Times ``interface.parse_lyrics_sections`` over a synthetic corpus of
+Genius-style lyric pages (section headers, contributor/embed furniture,
+credits, ad-libs) against the previous per-pattern implementation, and
+checks that both return identical sections for every page.
+
+Run:  python benchmarks/bench_lyrics_parser.py [--pages 3000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import interface
+
+WORDS = ('grace hope light holy spirit lord praise rise sing heart name king '
+         'glory mercy love faith fire ocean mountain waters forever amen').split()
+HEADERS = ['[Verse 1]', '[Verse 2]', '[Chorus]', '[Pre-Chorus]', '[Bridge]', '[Tag]', '[Outro]', '[Intro]',
+           '[Chorus: Brooke Ligertwood]', '[Official Video]']
+FURNITURE = ['123 Contributors', 'Oceans Lyrics', 'You might also like', '45Embed', 'Embed', 'Translations',
+             'Produced by Michael Guy Chislett', 'Written By Matt Crocker', 'Release Date: 2013', '(Ooh)', '7']
+
+
+def make_page(rng: random.Random) -> str:
+    lines = [rng.choice(FURNITURE[:2])]
+    for _ in range(rng.randint(4, 9)):
+        lines.append(rng.choice(HEADERS))
+        for _ in range(rng.randint(2, 8)):
+            lines.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))).capitalize())
+            if rng.random() < 0.08:
+                lines.append(rng.choice(FURNITURE))
+        lines.append('')
+    lines.append(rng.choice(['Embed', '12Embed', 'You might also like']))
+    return '\n'.join(lines)
+
+
+def parse_lyrics_sections_reference(lyrics: str) -> list[dict]:
+    """The per-line, per-pattern implementation this benchmark replaces."""
+    lines = [ln.strip() for ln in lyrics.splitlines()]
+    cleaned = []
+    for ln in lines:
+        if not ln:
+            continue
+        low = ln.lower()
+        if any(re.search(pat, low) for pat in interface.IGNORE_PATTERNS):
+            continue
+        cleaned.append(ln)
+    sections = []
+    current_label = 'SECTION'
+    buf = []
+    header_re = re.compile(r'^\[(.+?)\]\s*$')
+    for ln in cleaned:
+        m = header_re.match(ln)
+        if m:
+            if buf:
+                sections.append({'label': interface._normalize_section_label(current_label), 'text': '\n'.join(buf).strip()})
+                buf = []
+            current_label = m.group(1)
+            continue
+        buf.append(ln)
+    if buf:
+        sections.append({'label': interface._normalize_section_label(current_label), 'text': '\n'.join(buf).strip()})
+    if not sections:
+        joined = '\n'.join(cleaned).strip().upper()
+        if joined:
+            sections = [{'label': 'SECTION', 'text': joined}]
+    else:
+        for s in sections:
+            s['text'] = '\n'.join([t.upper() for t in s['text'].splitlines() if t.strip()])
+    return sections
+
+
+def bench(fn, corpus, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in corpus:
+            fn(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_page(rng) for _ in range(args.pages)]
+    for page in corpus:
+        assert interface.parse_lyrics_sections(page) == parse_lyrics_sections_reference(page)
+    total_lines = sum(page.count('\n') + 1 for page in corpus)
+
+    print(f"{args.pages} pages, {total_lines} lines (best of {args.repeat})")
+    for name, fn in (('per-pattern', parse_lyrics_sections_reference), ('combined', interface.parse_lyrics_sections)):
+        secs = bench(fn, corpus, args.repeat)
+        print(f"  {name:>11}: {secs:.3f}s  {total_lines / secs / 1e6:.2f}M lines/s  {secs / args.pages * 1e6:.0f} µs/page")
+
+
+if __name__ == '__main__':
+    main()
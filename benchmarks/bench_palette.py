@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Palette extraction benchmark
+============================
+
+Compares the old full-resolution decode used by ``compute_gradient_colors``
+with the draft-mode path in ``interface._average_colour`` on synthetic album
+covers.  Images are generated locally, so no network is involved; the
+numbers isolate decode cost.
+
+Memory is measured, not estimated: each path decodes each image once in a
+fresh child process, which reports its peak RSS growth over the decode
+(Pillow's pixel buffers live outside the Python heap, so tracemalloc alone
+cannot see them) and the tracemalloc peak of the Python-side allocations.
+
+Run:  python benchmarks/bench_palette.py [--sizes 640 1000 3000] [--repeat 20]
+"""
+
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+import interface
+
+
+def make_cover(side: int, fmt: str) -> bytes:
+    im = Image.radial_gradient('L').resize((side, side)).convert('RGB')
+    buf = io.BytesIO()
+    im.save(buf, format=fmt, quality=90)
+    return buf.getvalue()
+
+
+def full_decode(data: bytes):
+    """The pre-draft implementation: decode everything, then shrink to 1x1."""
+    with Image.open(io.BytesIO(data)) as im:
+        return im.convert('RGB').resize((1, 1)).getpixel((0, 0))
+
+
+def draft_decode(data: bytes):
+    return interface._average_colour(data)
+
+
+PATHS = {'full': full_decode, 'draft': draft_decode}
+
+
+def bench(fn, data: bytes, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(data)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS mark (Linux only); False where that isn't possible."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kib() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return float(line.split()[1])
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == 'darwin' else rss   # bytes on macOS, KiB elsewhere
+
+
+def measure_child(path: str, image_file: str):
+    """Run in a fresh process: decode once, print peak RSS growth and tracemalloc peak (KiB)."""
+    with open(image_file, 'rb') as f:
+        data = f.read()
+    # a tiny decode first, so plugin imports and decoder setup aren't counted
+    fmt = Image.open(io.BytesIO(data)).format
+    PATHS[path](make_cover(8, fmt))
+    # Without a resettable peak (non-Linux) the growth is measured against the
+    # process high-water mark so far, which can hide small decodes.
+    _reset_peak_rss()
+    before = _peak_rss_kib()
+    tracemalloc.start()
+    PATHS[path](data)
+    traced = tracemalloc.get_traced_memory()[1] / 1024
+    print(f'{_peak_rss_kib() - before:.0f} {traced:.0f}')
+
+
+def measure(path: str, data: bytes) -> tuple[float, float]:
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(data)
+    try:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', path, f.name],
+                             capture_output=True, text=True, check=True).stdout.split()
+    finally:
+        os.unlink(f.name)
+    return float(out[-2]), float(out[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[300, 1000, 3000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--child', nargs=2, metavar=('PATH', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure_child(*args.child); return
+
+    print(f"{'image':>14}  {'path':>6}  {'ms/image':>9}  {'peak RSS +':>11}  {'py heap peak':>12}")
+    for fmt in ('JPEG', 'PNG'):
+        for side in args.sizes:
+            data = make_cover(side, fmt)
+            for name, fn in PATHS.items():
+                ms = bench(fn, data, args.repeat)
+                rss, traced = measure(name, data)
+                print(f"{fmt:>4} {side:>4}x{side:<4}  {name:>6}  {ms:>9.2f}  {rss:>7.0f} KiB  {traced:>8.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
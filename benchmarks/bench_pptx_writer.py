@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+PPTX writer benchmark
+=====================
+
+Writes synthetic decks of 200 and 2,000 two-line lyric slides to a temporary
+``.pptx`` with ``lyrics_to_slides_improved.write_pptx_deck`` and reports wall
+time, slides per second and file size.  The background is a local placeholder JPEG so the run
+never touches the network.
+
+Run:  python benchmarks/bench_pptx_writer.py [--slides 200 2000] [--per-song 20] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lyrics_to_slides_improved
+import pptx_writer
+
+
+def make_setlist(total_slides: int, per_song: int):
+    songs = []
+    for sidx in range(0, total_slides, per_song):
+        count = min(per_song, total_slides - sidx)
+        lyric_slides = [[f'LINE {sidx + i} A', f'LINE {sidx + i} B'] for i in range(count)]
+        songs.append((f'Song {sidx // per_song + 1} – Artist', lyric_slides))
+    return songs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--slides', type=int, nargs='+', default=[200, 2000])
+    parser.add_argument('--per-song', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        background = os.path.join(tmp, 'bg.jpg')
+        with open(background, 'wb') as f:
+            f.write(b'\xff\xd8\xff\xe0' + os.urandom(300_000))
+        pptx_writer.PPTX_BACKGROUND_PATH = background
+        out = os.path.join(tmp, 'deck.pptx')
+        for total in args.slides:
+            songs = make_setlist(total, args.per_song)
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                lyrics_to_slides_improved.write_pptx_deck(out, 'Benchmark Deck', songs)
+                best = min(best, time.perf_counter() - start)
+            with zipfile.ZipFile(out) as z:
+                slide_parts = sum(1 for n in z.namelist() if n.startswith('ppt/slides/slide'))
+            deck_slides = 1 + len(songs) + total
+            assert slide_parts == deck_slides
+            print(f"{deck_slides:>6} slides: {best * 1000:8.1f} ms  {deck_slides / best:10.0f} slides/s  "
+                  f"{os.path.getsize(out) / 1024:8.1f} KiB  (best of {args.repeat})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Slides request builder benchmark
+================================
+
+Builds synthetic decks of 1,000 and 10,000 two-line lyric slides with
+``lyrics_to_slides_improved.iter_deck_requests`` and reports build time,
+throughput and peak Python memory (tracemalloc) for two consumers:
+
+* ``stream``  – iterate the requests one song at a time, as
+  ``write_deck`` does when submitting chunks;
+* ``list``    – materialise the whole deck as a single request list.
+
+Run:  python benchmarks/bench_slide_requests.py [--slides 1000 10000] [--per-song 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lyrics_to_slides_improved as slides
+
+
+def make_setlist(total_slides: int, per_song: int):
+    songs = []
+    for sidx in range(0, total_slides, per_song):
+        count = min(per_song, total_slides - sidx)
+        lyric_slides = [[f'LINE {sidx + i} A', f'LINE {sidx + i} B'] for i in range(count)]
+        songs.append((f'Song {sidx // per_song + 1} – Artist', lyric_slides))
+    return songs
+
+
+def consume_stream(songs):
+    n = 0
+    for group in slides.deck_request_groups('Benchmark Deck', songs, 'default'):
+        n += len(group)
+    return n
+
+
+def consume_list(songs):
+    return len(list(slides.iter_deck_requests('Benchmark Deck', songs, 'default')))
+
+
+def measure(fn, songs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn(songs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--slides', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--per-song', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'slides':>7}  {'mode':>6}  {'requests':>9}  {'seconds':>8}  {'req/s':>10}  {'peak MiB':>9}")
+    for total in args.slides:
+        songs = make_setlist(total, args.per_song)
+        for name, fn in (('stream', consume_stream), ('list', consume_list)):
+            count, elapsed, peak = measure(fn, songs)
+            print(f"{total:>7}  {name:>6}  {count:>9}  {elapsed:>8.3f}  {count / elapsed:>10.0f}  {peak / 2**20:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Song index benchmark
+====================
+
+Builds ``song_index.SongIndex`` over a synthetic catalogue of worship-style
+titles and artists, then times typed-prefix and misspelt lookups (the
+``/suggest?local=1`` path) and the snapshot round trip.
+
+Run:  python benchmarks/bench_song_index.py [--songs 20000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from song_index import SongIndex
+
+WORDS = ('grace hope light holy spirit lord praise rise sing heart name king glory mercy love faith fire ocean '
+         'mountain waters forever amen way maker goodness great worthy alive cornerstone build life reckless '
+         'blessing spirit break every chain what beautiful another in the fire still wonder').split()
+ARTISTS = ['Hillsong UNITED', 'Hillsong Worship', 'Bethel Music', 'Elevation Worship', 'Maverick City Music',
+           'Phil Wickham', 'Chris Tomlin', 'Passion', 'Jesus Culture', 'Kari Jobe', 'Matt Redman', 'CeCe Winans',
+           'Shane & Shane', 'Brandon Lake', 'Sinach', 'Leeland', 'Housefires', 'Vertical Worship']
+
+
+SYLLABLES = 'ba be bo da de di el fa ga ho ka la le li lo lu ma me mi mo na ne no ra re ri ro sa se so ta te ti va ve'.split()
+
+
+def make_catalogue(rng: random.Random, n: int) -> list[tuple[str, str, str]]:
+    # real worship vocabulary plus invented words, for a realistic spread of trigrams
+    vocab = WORDS + [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(4000)]
+    songs = []
+    for i in range(n):
+        title = ' '.join(rng.choice(vocab) for _ in range(rng.randint(1, 4))).title()
+        songs.append((title, rng.choice(ARTISTS), f'https://genius.com/song-{i}'))
+    return songs
+
+
+def typo(rng: random.Random, text: str) -> str:
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--songs', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalogue = make_catalogue(rng, args.songs)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SongIndex(path=os.path.join(tmp, 'song_index.json.gz'), size=args.songs)
+        start = time.perf_counter()
+        for title, artist, url in catalogue:
+            index.add(title, artist, url)
+        build = time.perf_counter() - start
+
+        queries = []
+        for _ in range(args.queries):
+            title, artist, _ = rng.choice(catalogue)
+            kind = rng.random()
+            q = title[:rng.randint(min(3, len(title)), len(title))] if kind < 0.5 else typo(rng, title) if kind < 0.8 else f'{title} {artist}'
+            queries.append((q, title))
+        timings, found = [], 0
+        for q, title in queries:
+            t0 = time.perf_counter()
+            hits = index.search(q, 5)
+            timings.append((time.perf_counter() - t0) * 1000)
+            found += any(h['title'] == title for h in hits)
+
+        start = time.perf_counter(); index.save(force=True); save = time.perf_counter() - start
+        size = os.path.getsize(index.path)
+        reloaded = SongIndex(path=index.path, size=args.songs)
+        start = time.perf_counter(); reloaded.load(); load = time.perf_counter() - start
+
+    timings.sort()
+    print(f"{args.songs} songs indexed in {build:.2f}s; snapshot {size / 1024:.0f} KiB, saved in {save:.2f}s, loaded in {load:.2f}s")
+    print(f"{args.queries} lookups: median {statistics.median(timings):.2f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95)]:.2f} ms, max {timings[-1]:.2f} ms; "
+          f"intended song in top 5 for {found / len(queries):.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Template-mode benchmark
+=======================
+
+Builds the same synthetic setlist with ``write_deck(mode='direct')`` and
+``write_deck(mode='template')`` against an in-memory stand-in for the Slides
+API, then reports sub-request count, JSON payload size and the time the
+stand-in spends applying the batchUpdates.  The stand-in keeps a small page
+model (slides, shapes, text), so the two modes are also checked to produce
+the same slides, in the same order, with the same text.
+
+Run:  python benchmarks/bench_template_mode.py [--slides 200 1000 5000] [--per-song 20]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lyrics_to_slides_improved as slides
+
+
+class StandInSlides:
+    """Just enough of ``service.presentations()`` to apply deck requests."""
+
+    def __init__(self):
+        self.pages: list[str] = []
+        self.page_elements: dict[str, list[str]] = {}
+        self.elements: dict[str, dict] = {}
+        self.backgrounds: dict[str, str] = {}
+        self.requests = 0
+        self.payload_bytes = 0
+        self.apply_seconds = 0.0
+        self._pending = None
+
+    # service.presentations().create(...).execute() / batchUpdate(...).execute()
+    def presentations(self):
+        return self
+
+    def create(self, body):
+        self._pending = ('create', body)
+        return self
+
+    def batchUpdate(self, presentationId, body):
+        self._pending = ('batch', body)
+        return self
+
+    def execute(self):
+        kind, body = self._pending
+        if kind == 'create':
+            self._new_page('default')
+            return {'presentationId': 'standin', 'slides': [{'objectId': 'default'}]}
+        self.payload_bytes += len(json.dumps(body))
+        start = time.perf_counter()
+        for request in body['requests']:
+            (name, args), = request.items()
+            getattr(self, '_' + name)(args)
+        self.apply_seconds += time.perf_counter() - start
+        self.requests += len(body['requests'])
+        return {}
+
+    def _new_page(self, page_id, index=None):
+        self.pages.insert(len(self.pages) if index is None else index, page_id)
+        self.page_elements[page_id] = []
+
+    def _createSlide(self, a):
+        self._new_page(a['objectId'])
+
+    def _updatePageProperties(self, a):
+        self.backgrounds[a['objectId']] = a['pageProperties']['pageBackgroundFill']['stretchedPictureFill']['contentUrl']
+
+    def _createShape(self, a):
+        page = a['elementProperties']['pageObjectId']
+        self.elements[a['objectId']] = {'page': page, 'text': '', 'props': copy.deepcopy(a['elementProperties'])}
+        self.page_elements[page].append(a['objectId'])
+
+    def _style(self, a):
+        self.elements[a['objectId']].setdefault('styles', []).append(copy.deepcopy(a))
+
+    _updateShapeProperties = _updateTextStyle = _updateParagraphStyle = _style
+
+    def _insertText(self, a):
+        el = self.elements[a['objectId']]
+        el['text'] = el['text'][:a['insertionIndex']] + a['text'] + el['text'][a['insertionIndex']:]
+
+    def _duplicateObject(self, a):
+        src, ids = a['objectId'], a.get('objectIds', {})
+        new_page = ids.get(src, src + '_copy')
+        self._new_page(new_page, self.pages.index(src) + 1)
+        if src in self.backgrounds:
+            self.backgrounds[new_page] = self.backgrounds[src]
+        for el_id in self.page_elements[src]:
+            new_id = ids.get(el_id, el_id + '_copy')
+            el = dict(self.elements[el_id], page=new_page)
+            self.elements[new_id] = el
+            self.page_elements[new_page].append(new_id)
+
+    def _replaceAllText(self, a):
+        needle = a['containsText']['text']
+        for page in a.get('pageObjectIds') or self.pages:
+            for el_id in self.page_elements[page]:
+                el = self.elements[el_id]
+                el['text'] = el['text'].replace(needle, a['replaceText'])
+
+    def _updateSlidesPosition(self, a):
+        moving = a['slideObjectIds']
+        moved = set(moving)
+        rest = [p for p in self.pages if p not in moved]
+        idx = a['insertionIndex']
+        self.pages = rest[:idx] + moving + rest[idx:]
+
+    def _deleteObject(self, a):
+        obj = a['objectId']
+        if obj in self.page_elements:
+            self.pages.remove(obj)
+            for el_id in self.page_elements.pop(obj):
+                del self.elements[el_id]
+            self.backgrounds.pop(obj, None)
+        else:
+            el = self.elements.pop(obj)
+            self.page_elements[el['page']].remove(obj)
+
+    def deck(self):
+        return [(p, self.backgrounds.get(p), [self.elements[e]['text'] for e in self.page_elements[p]])
+                for p in self.pages]
+
+
+def make_setlist(total_slides: int, per_song: int):
+    songs = []
+    for sidx in range(0, total_slides, per_song):
+        count = min(per_song, total_slides - sidx)
+        lyric_slides = [[f'LINE {sidx + i} A', f'LINE {sidx + i} B'] if i % 5 else [f'LINE {sidx + i}']
+                        for i in range(count)]
+        songs.append((f'Song {sidx // per_song + 1} – Artist', lyric_slides))
+    return songs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--slides', type=int, nargs='+', default=[200, 1000, 5000])
+    parser.add_argument('--per-song', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'slides':>7}  {'mode':>8}  {'requests':>9}  {'payload KiB':>11}  {'apply s':>8}  {'total s':>8}")
+    for total in args.slides:
+        songs = make_setlist(total, args.per_song)
+        decks = {}
+        for mode in ('direct', 'template'):
+            svc = StandInSlides()
+            start = time.perf_counter()
+            slides.write_deck(svc, 'Benchmark Deck', songs, mode=mode)
+            elapsed = time.perf_counter() - start
+            decks[mode] = svc.deck()
+            print(f"{total:>7}  {mode:>8}  {svc.requests:>9}  {svc.payload_bytes / 1024:>11.0f}  "
+                  f"{svc.apply_seconds:>8.3f}  {elapsed:>8.3f}")
+        assert decks['direct'] == decks['template'], 'template mode produced a different deck'
+
+
+if __name__ == '__main__':
+    main()
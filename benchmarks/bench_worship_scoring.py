@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Worship scoring benchmark
+=========================
+
+Scores a large candidate set, the size the song index sees when it warms from
+the lyrics cache and library, three ways:
+
+* the per-keyword substring loop the CLI and server used to run,
+* ``WorshipScorer.score`` (memoised per-word keyword bitmasks, one candidate at a time),
+* ``WorshipScorer.score_batch`` (the same bit table over the whole set in one call),
+
+and checks that all three agree for the default keywords.
+
+Run:  python benchmarks/bench_worship_scoring.py [--candidates 100000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worship_scoring import DEFAULT_WORSHIP_KEYWORDS, WorshipScorer
+
+WORDS = ('grace hope light holy spirit lord praise rise sing heart name king glory mercy love faith fire ocean '
+         'mountain waters forever amen way maker goodness great worthy alive cornerstone build life reckless '
+         'blessing break every chain beautiful another wonder dance night city summer baby money road').split()
+ARTISTS = ['Hillsong UNITED', 'Hillsong Worship', 'Bethel Music', 'Elevation Worship', 'Maverick City Music',
+           'Phil Wickham', 'Chris Tomlin', 'Passion', 'Jesus Culture', 'Kari Jobe', 'Matt Redman', 'CeCe Winans',
+           'Taylor Swift', 'Coldplay', 'Drake', 'The Beatles', 'Adele', 'Ed Sheeran', 'U2', 'Gospel Choir']
+
+
+def reference_score(title: str, artist: str) -> int:
+    combined = f'{title} {artist}'.lower()
+    return sum(1 for kw in DEFAULT_WORSHIP_KEYWORDS if kw in combined)
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter(); fn(); best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--candidates', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    candidates = [(' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 5))).title(), rng.choice(ARTISTS))
+                  for _ in range(args.candidates)]
+    scorer = WorshipScorer()
+
+    expected = [reference_score(t, a) for t, a in candidates]
+    assert [scorer.score(t, a) for t, a in candidates] == expected
+    assert scorer.score_batch(candidates) == expected
+    # multi-word keywords take the substring path; check it against the same rule,
+    # including keywords that share a prefix ('holy spirit' / 'holy', 'hillsong united' / 'hillsong')
+    phrases = ['holy spirit', 'holy', 'spirit', 'king', 'hillsong united', 'hillsong', 'grace']
+    assert WorshipScorer(['holy spirit', 'holy', 'spirit']).score('Holy Spirit', 'x') == 3
+    phrase_scorer = WorshipScorer(phrases)
+    sample = candidates[:5000]
+    assert phrase_scorer.score_batch(sample) == [sum(kw in f'{t} {a}'.lower() for kw in phrases) for t, a in sample]
+
+    print(f"{args.candidates} candidates, {len(DEFAULT_WORSHIP_KEYWORDS)} keywords (best of {args.repeat})")
+    for name, fn in (('substring loop', lambda: [reference_score(t, a) for t, a in candidates]),
+                     ('score()', lambda: [scorer.score(t, a) for t, a in candidates]),
+                     ('score_batch()', lambda: scorer.score_batch(candidates))):
+        secs = best_of(args.repeat, fn)
+        print(f"  {name:>14}: {secs * 1000:8.1f} ms  {secs / args.candidates * 1e6:.2f} µs/candidate")
+
+
+if __name__ == '__main__':
+    main()
@@ -21,23 +21,33 @@ This build refreshes the *entire* interface to match the song cards:
 Run:  python frontend4_fixed.py
 """
 
-import base64
 import datetime
+import gzip
+import hashlib
 import http.server
+import io
 import json
 import os
+import select
+import socket
 import socketserver
 import threading
+import time
+import sqlite3
 import urllib.parse
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait
 from zoneinfo import ZoneInfo
 
 import lyrics_to_slides_improved
-from lyricsgenius import Genius
+from lyrics_to_slides_improved import GENIUS_POOL
+from lyrics_library import LIBRARY_URL_PREFIX, LYRICS_LIBRARY, LYRICS_LIBRARY_DIRS, _normalize_section_label, is_library_url, search_key
+from song_index import SONG_INDEX
+from worship_scoring import WORSHIP_SCORER
 
 import requests
-import tempfile
 from dotenv import load_dotenv
-import subprocess
 import re
 from string import Template
 
@@ -47,12 +57,18 @@ try:
 except Exception:
     PIL_AVAILABLE = False
 
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except Exception:
+    BROTLI_AVAILABLE = False
+
 BACKGROUND_JPEG_PATH = os.path.join(os.path.dirname(__file__), 'abstract_bg.jpg')
 if os.path.exists(BACKGROUND_JPEG_PATH):
     with open(BACKGROUND_JPEG_PATH, 'rb') as f:
-        BACKGROUND_DATA = base64.b64encode(f.read()).decode('ascii')
+        BACKGROUND_JPEG = f.read()
 else:
-    BACKGROUND_DATA = ''
+    BACKGROUND_JPEG = b''
 
 INDEX_HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -85,7 +101,7 @@ INDEX_HTML_TEMPLATE = """
         radial-gradient(1200px 600px at 10% -10%, rgba(124,92,255,0.18), transparent 60%),
         radial-gradient(900px 500px at 110% 110%, rgba(0,209,209,0.18), transparent 60%),
         linear-gradient(180deg, rgba(255,255,255,0.03), rgba(255,255,255,0.00)),
-        url('data:image/jpeg;base64,$bg_data');
+        $bg_url;
       background-color: var(--bg);
       background-attachment: fixed, fixed, fixed, fixed;
       background-size: cover, cover, cover, cover;
@@ -571,9 +587,59 @@ INDEX_HTML_TEMPLATE = """
     </div>
   </div>
 
-  <script>
+  <script src="$app_js_url"></script>
+</body>
+</html>
+"""
+
+APP_JS = """
     const songs = [];
 
+    // --- Suggestions: one in-flight /suggest per tab ---
+    // A newer query aborts the older request, and the server (told this tab's id and
+    // sequence number) skips the Genius search for queries a newer Add/Replace superseded.
+    // Nothing is fetched while typing: /suggest only runs on Add or Replace, as before.
+    const suggestSession = Math.random().toString(36).slice(2);
+    const suggestMemo = new Map();
+    let suggestSeq = 0, suggestAbort = null;
+    function fetchSuggestions(query) {
+      const q = query.trim();
+      if (suggestMemo.has(q)) return suggestMemo.get(q);
+      if (suggestAbort) suggestAbort.abort();
+      const ctrl = suggestAbort = new AbortController();
+      const params = new URLSearchParams({q, sid: suggestSession, seq: String(++suggestSeq)});
+      const pending = fetch('/suggest?' + params, {signal: ctrl.signal})
+        .then(resp => { if (!resp.ok) throw new Error('suggest failed: ' + resp.status); return resp.json(); })
+        .then(data => data.suggestions || [])
+        .finally(() => { if (suggestAbort === ctrl) suggestAbort = null; });
+      suggestMemo.set(q, pending);
+      if (suggestMemo.size > 50) suggestMemo.delete(suggestMemo.keys().next().value);
+      pending.catch(() => { if (suggestMemo.get(q) === pending) suggestMemo.delete(q); });
+      return pending;
+    }
+    // Songs the server already knows render at once (?local=1 never waits on Genius);
+    // the merged Genius answer replaces them unless the user has already picked or closed.
+    let localShownFor = null, finalShownFor = null;
+    function showLocalSuggestions(query) {
+      localShownFor = finalShownFor = null;
+      return fetch('/suggest?' + new URLSearchParams({q: query.trim(), local: '1'}))
+        .then(resp => resp.ok ? resp.json() : {suggestions: []})
+        .then(data => {
+          const hits = data.suggestions || [];
+          if (hits.length && finalShownFor !== query) { showSuggestions(query, hits); localShownFor = query; }
+        })
+        .catch(() => {});
+    }
+    function showFinalSuggestions(query, suggestions) {
+      finalShownFor = query;
+      if (localShownFor === query && document.getElementById('suggestion-modal').style.display === 'none') return;
+      showSuggestions(query, suggestions);
+    }
+    async function openSuggestions(query) {
+      showLocalSuggestions(query);
+      showFinalSuggestions(query, await fetchSuggestions(query));
+    }
+
     function hexToRgb(hex) {
       const res = /^#?([a-f\\d]{2})([a-f\\d]{2})([a-f\\d]{2})$/i.exec(hex);
       return res ? { r: parseInt(res[1], 16), g: parseInt(res[2], 16), b: parseInt(res[3], 16) } : {r:0,g:0,b:0};
@@ -694,9 +760,7 @@ INDEX_HTML_TEMPLATE = """
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -765,9 +829,7 @@ INDEX_HTML_TEMPLATE = """
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -807,11 +869,11 @@ INDEX_HTML_TEMPLATE = """
       const input = document.getElementById('song-input');
       const query = input.value.trim();
       if (!query) return;
-      fetch('/suggest?q=' + encodeURIComponent(query))
-        .then(resp => resp.json())
-        .then(data => {
-          if (data.suggestions && data.suggestions.length > 0) {
-            showSuggestions(query, data.suggestions);
+      showLocalSuggestions(query);
+      fetchSuggestions(query)
+        .then(suggestions => {
+          if (suggestions.length > 0) {
+            showFinalSuggestions(query, suggestions);
           } else {
             const song = { title: query, artist: '', url: null, thumbnail: null, lightColor: '#444444', darkColor: '#222222', customSlides: null, customSections: null };
             songs.push(song); input.value = ''; 
@@ -847,9 +909,7 @@ INDEX_HTML_TEMPLATE = """
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -934,9 +994,7 @@ INDEX_HTML_TEMPLATE = """
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -1042,9 +1100,7 @@ INDEX_HTML_TEMPLATE = """
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -1115,9 +1171,7 @@ INDEX_HTML_TEMPLATE = """
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -1375,9 +1429,7 @@ seed.then(data => {
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -1450,9 +1502,7 @@ seed.then(data => {
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -1496,15 +1546,49 @@ seed.then(data => {
       const btn = document.getElementById('generate-btn'); btn.disabled = true;
       document.getElementById('loading').style.display = 'block';
       const payloadSongs = songs.map(s => ({ title: s.title, artist: s.artist, url: s.url, customSlides: s.customSlides || null }));
-      fetch('/generate', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ songs: payloadSongs }) })
-      .then(resp => resp.json())
-      .then(data => {
-        document.getElementById('loading').style.display = 'none'; btn.disabled = false;
+      // Live progress over SSE; the server ties the stream to the jobId we post.
+      const jobId = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : String(Date.now()) + Math.random().toString(16).slice(2);
+      const loading = document.getElementById('loading'); let fetched = 0;
+      const progress = new EventSource('/progress?job=' + encodeURIComponent(jobId));
+      progress.addEventListener('stage', e => {
+        const d = JSON.parse(e.data);
+        loading.textContent = d.stage === 'fetch' ? `Fetching lyrics (0/${d.songs})…` : d.stage === 'authenticate' ? 'Signing in to Google…' : 'Writing slides…';
+      });
+      progress.addEventListener('song', e => { fetched++; loading.textContent = `Fetching lyrics (${fetched}/${payloadSongs.length})…`; });
+      progress.addEventListener('chunk', e => { const d = JSON.parse(e.data); loading.textContent = `Writing slides (${d.chunk}/${d.total})…`; });
+      const finish = (data) => {
+        progress.close(); loading.textContent = 'Creating presentation... Please wait.';
+        loading.style.display = 'none'; btn.disabled = false;
         const linkDiv = document.getElementById('result-link');
-        if (data.status === 'ok') { linkDiv.style.display = 'block'; linkDiv.innerHTML = 'Your presentation is ready: <a href="' + data.url + '" target="_blank">Open in Google Slides</a>'; }
+        if (data.status === 'ok') {
+          linkDiv.style.display = 'block'; linkDiv.innerHTML = 'Your presentation is ready: <a href="' + data.url + '" target="_blank">Open in Google Slides</a>';
+          if (data.failed && data.failed.length) {
+            const note = document.createElement('div'); note.textContent = 'Skipped (no lyrics): ' + data.failed.map(f => f.title).join(', ');
+            linkDiv.appendChild(note);
+          }
+        }
         else { linkDiv.style.display = 'block'; linkDiv.innerHTML = 'Error: ' + (data.message || 'Unknown error'); }
-      })
-      .catch(err => { document.getElementById('loading').style.display = 'none'; btn.disabled = false; alert('An error occurred generating slides.'); });
+      };
+      // The job runs server-side; its final event carries the result.
+      progress.addEventListener('done', e => finish(JSON.parse(e.data)));
+      progress.addEventListener('error', e => {
+        if (e.data) { finish({ status: 'error', message: JSON.parse(e.data).message }); return; }
+        // Turned away (too many streams) or dropped: poll the job instead.
+        if (progress.readyState !== EventSource.CLOSED || progress.polling) return;
+        progress.polling = true;
+        const poll = () => fetch('/jobs/' + encodeURIComponent(jobId)).then(r => r.ok ? r.json() : null).then(job => {
+          if (job && job.status === 'done') finish(job.result);
+          else if (job && job.status === 'error') finish({ status: 'error', message: job.error });
+          else if (job && job.status === 'cancelled') finish({ status: 'error', message: 'Generation cancelled' });
+          else if (btn.disabled) setTimeout(poll, 2000);
+        }).catch(() => { if (btn.disabled) setTimeout(poll, 2000); });
+        poll();
+      });
+      progress.addEventListener('cancelled', () => finish({ status: 'error', message: 'Generation cancelled' }));
+      fetch('/generate', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ songs: payloadSongs, jobId }) })
+      .then(resp => resp.json())
+      .then(data => { if (data.status !== 'queued') finish(data); })
+      .catch(err => { progress.close(); loading.style.display = 'none'; btn.disabled = false; alert('An error occurred generating slides.'); });
     });
 
     
@@ -1540,9 +1624,7 @@ seed.then(data => {
       document.getElementById('song-info-replace').onclick = async () => {
         modal.style.display = 'none';
         const query = s.artist ? `${s.title} – ${s.artist}` : s.title;
-        const resp = await fetch('/suggest?q=' + encodeURIComponent(query));
-        const data = await resp.json();
-        showSuggestions(query, data.suggestions || []);
+        await openSuggestions(query);
       };
       document.getElementById('song-info-remove').onclick = () => { modal.style.display = 'none'; removeSong(index); };
       document.getElementById('song-info-x').onclick = () => { modal.style.display = 'none'; };
@@ -1577,16 +1659,43 @@ seed.then(data => {
     }
 
     renderSongs();
-  </script>
-</body>
-</html>
-
 """
 
-_template_str = INDEX_HTML_TEMPLATE.replace('{{', '{').replace('}}', '}')
-INDEX_HTML = Template(_template_str).safe_substitute(bg_data=BACKGROUND_DATA)
-
-import io
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', str(365 * 24 * 3600)))
+
+class StaticAsset:
+    """An in-memory response body with its ETag and precompressed gzip/brotli variants."""
+    def __init__(self, body: bytes, content_type: str, cache_control: str, compress: bool = True):
+        self.content_type = content_type; self.cache_control = cache_control
+        self.digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.etag = f'"{self.digest}"'
+        self.bodies = {'identity': body}
+        if compress:
+            # keep an encoding only when it actually saves bytes
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < len(body): self.bodies['gzip'] = gz
+            if BROTLI_AVAILABLE:
+                br = brotli.compress(body, quality=11)
+                if len(br) < len(body): self.bodies['br'] = br
+
+    def negotiate(self, accept_encoding: str) -> str:
+        offered = {tok.split(';')[0].strip().lower() for tok in (accept_encoding or '').split(',')}
+        for encoding in ('br', 'gzip'):
+            if encoding in offered and encoding in self.bodies: return encoding
+        return 'identity'
+
+_IMMUTABLE = f'public, max-age={STATIC_MAX_AGE}, immutable'
+APP_JS_ASSET = StaticAsset(APP_JS.encode('utf-8'), 'text/javascript; charset=utf-8', _IMMUTABLE)
+BACKGROUND_ASSET = StaticAsset(BACKGROUND_JPEG, 'image/jpeg', _IMMUTABLE, compress=False) if BACKGROUND_JPEG else None
+# Versioned URLs: a changed script or image gets a new URL, so the immutable headers are safe.
+STATIC_ASSETS = {f'/static/app.{APP_JS_ASSET.digest}.js': APP_JS_ASSET}
+if BACKGROUND_ASSET:
+    STATIC_ASSETS[f'/static/bg.{BACKGROUND_ASSET.digest}.jpg'] = BACKGROUND_ASSET
+INDEX_HTML = Template(INDEX_HTML_TEMPLATE).safe_substitute(
+    app_js_url=f'/static/app.{APP_JS_ASSET.digest}.js',
+    bg_url=f"url('/static/bg.{BACKGROUND_ASSET.digest}.jpg')" if BACKGROUND_ASSET else 'none')
+# The page itself must be revalidated each load (it names the current asset versions); ETag makes that a 304.
+STATIC_ASSETS['/'] = StaticAsset(INDEX_HTML.encode('utf-8'), 'text/html; charset=utf-8', 'no-cache')
 
 def _lighten(r, g, b, factor=0.35):
     lr = int(r + (255 - r) * factor); lg = int(g + (255 - g) * factor); lb = int(b + (255 - b) * factor)
@@ -1599,224 +1708,679 @@ def _darken(r, g, b, factor=0.35):
 def _to_hex(rgb_tuple):
     r, g, b = rgb_tuple; return f"#{r:02x}{g:02x}{b:02x}"
 
-def compute_gradient_colors(image_url: str):
-    if PIL_AVAILABLE:
-        try:
-            resp = requests.get(image_url, timeout=10); resp.raise_for_status()
-            from PIL import Image
-            with Image.open(io.BytesIO(resp.content)) as im:
-                im = im.convert('RGB').resize((1, 1))
-                r, g, b = im.getpixel((0, 0))
-            return _to_hex(_lighten(r, g, b)), _to_hex(_darken(r, g, b))
-        except Exception:
-            pass
+PALETTE_MAX_BYTES = int(os.getenv('PALETTE_MAX_BYTES', str(4 * 1024 * 1024)))
+PALETTE_DECODE_SIZE = (64, 64)
+
+def _download_image(image_url: str, limit: int = PALETTE_MAX_BYTES) -> bytes:
+    """Stream an image into memory, refusing anything larger than ``limit`` bytes."""
+    with requests.get(image_url, timeout=10, stream=True) as resp:
+        resp.raise_for_status()
+        if int(resp.headers.get('Content-Length') or 0) > limit: raise ValueError('Image too large')
+        buf = bytearray()
+        for chunk in resp.iter_content(64 * 1024):
+            buf += chunk
+            if len(buf) > limit: raise ValueError('Image too large')
+    return bytes(buf)
+
+def _average_colour(data: bytes):
+    with Image.open(io.BytesIO(data)) as im:
+        # JPEG draft mode lets libjpeg decode at 1/2..1/8 scale, so a large
+        # cover is never expanded to full resolution; other formats are
+        # shrunk to a thumbnail before the 1x1 average.
+        im.draft('RGB', PALETTE_DECODE_SIZE)
+        im = im.convert('RGB'); im.thumbnail(PALETTE_DECODE_SIZE)
+        return im.resize((1, 1)).getpixel((0, 0))
+
+def _extract_palette(image_url: str):
+    if not PIL_AVAILABLE: return None
     try:
-        resp = requests.get(image_url, timeout=10); resp.raise_for_status()
-        with tempfile.NamedTemporaryFile(suffix='.img', delete=False) as tmp:
-            tmp.write(resp.content); tmp.flush()
-            output = subprocess.check_output(['convert', tmp.name, '-resize', '1x1!', 'txt:-'],
-                                             stderr=subprocess.DEVNULL, text=True)
-        match = re.search(r'\((\d+),\s*(\d+),\s*(\d+)\)', output)
-        if not match: raise ValueError('Could not parse colour')
-        r, g, b = map(int, match.groups())
-        return _to_hex(_lighten(r, g, b)), _to_hex(_darken(r, g, b))
+        r, g, b = _average_colour(_download_image(image_url))
     except Exception:
-        return '#444444', '#222222'
+        return None
+    return _to_hex(_lighten(r, g, b)), _to_hex(_darken(r, g, b))
+
+DEFAULT_PALETTE = ('#444444', '#222222')
+PALETTE_CACHE_SIZE = int(os.getenv('PALETTE_CACHE_SIZE', '1024'))
+PALETTE_CACHE_PATH = os.getenv('PALETTE_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'palette_cache.sqlite3'))
+
+class PaletteCache:
+    """Image URL -> (light, dark) colours: bounded LRU over a SQLite table.
+
+    Concurrent lookups of the same URL share a single download/decode.
+    Failed extractions are not cached, so a flaky CDN is retried next time.
+    """
+    def __init__(self, size=PALETTE_CACHE_SIZE, path=PALETTE_CACHE_PATH):
+        self.size = size; self.path = path
+        self._entries: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock(); self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('CREATE TABLE IF NOT EXISTS palettes (url TEXT PRIMARY KEY, light TEXT, dark TEXT)')
+        return self._conn
+
+    def _remember(self, url, colors):
+        self._entries[url] = colors; self._entries.move_to_end(url)
+        while len(self._entries) > self.size: self._entries.popitem(last=False)
+
+    def get_or_compute(self, url: str, compute):
+        with self._lock:
+            colors = self._entries.get(url)
+            if colors:
+                self._entries.move_to_end(url); return colors
+            if self.path:
+                try: row = self._db().execute('SELECT light, dark FROM palettes WHERE url = ?', (url,)).fetchone()
+                except sqlite3.Error: row = None
+                if row:
+                    colors = (row[0], row[1]); self._remember(url, colors); return colors
+            fut = self._inflight.get(url); owner = fut is None
+            if owner: fut = self._inflight[url] = Future()
+        if not owner: return fut.result()
+        try:
+            colors = compute(url)
+        except Exception:
+            colors = None
+        with self._lock:
+            del self._inflight[url]
+            if colors:
+                self._remember(url, colors)
+                if self.path:
+                    try: self._db().execute('INSERT OR REPLACE INTO palettes VALUES (?, ?, ?)', (url, colors[0], colors[1]))
+                    except sqlite3.Error: pass
+        fut.set_result(colors)
+        return colors
+
+PALETTE_CACHE = PaletteCache()
 
-def get_suggestions(query: str, max_results: int = 5):
-    token = os.getenv('GENIUS_ACCESS_TOKEN')
-    genius = Genius(token, skip_non_songs=True, excluded_terms=['(Remix)', '(Live)'], remove_section_headers=True, timeout=15, retries=3)
+def compute_gradient_colors(image_url: str):
+    return PALETTE_CACHE.get_or_compute(image_url, _extract_palette) or DEFAULT_PALETTE
+
+SUGGEST_CACHE_SIZE = int(os.getenv('SUGGEST_CACHE_SIZE', '512'))
+SUGGEST_CACHE_TTL = float(os.getenv('SUGGEST_CACHE_TTL', '86400'))
+SUGGEST_CACHE_NEGATIVE_TTL = float(os.getenv('SUGGEST_CACHE_NEGATIVE_TTL', '600'))
+SUGGEST_CACHE_PATH = os.getenv('SUGGEST_CACHE_PATH', '')
+
+def normalize_query(query: str) -> str:
+    """Canonical cache key for a search: case, spacing and dash style folded."""
+    title, artist = lyrics_to_slides_improved.split_title_artist(re.sub(r'[\u2012-\u2015]', '-', query or ''))
+    key = ' '.join(title.lower().split())
+    artist = ' '.join(artist.lower().split())
+    return f"{key} - {artist}" if artist else key
+
+class SuggestionCache:
+    """In-process LRU of /suggest results keyed by normalised query.
+
+    Empty results are kept for a shorter TTL so repeated misses stay local.
+    Only exact keys are served: Genius search is fuzzy, so a shorter query's
+    answer says nothing about a longer one's.  With ``path`` set, entries
+    are also written through to a SQLite table so they survive restarts.
+    """
+    def __init__(self, size=SUGGEST_CACHE_SIZE, ttl=SUGGEST_CACHE_TTL, negative_ttl=SUGGEST_CACHE_NEGATIVE_TTL, path=SUGGEST_CACHE_PATH):
+        self.size = size; self.ttl = ttl; self.negative_ttl = negative_ttl; self.path = path
+        self._entries: OrderedDict[tuple, tuple[float, list]] = OrderedDict()
+        self._lock = threading.Lock(); self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('CREATE TABLE IF NOT EXISTS suggestions (key TEXT, max_results INTEGER, expires REAL, data TEXT, PRIMARY KEY (key, max_results))')
+        return self._conn
+
+    def get(self, key: str, max_results: int):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((key, max_results))
+            if entry and entry[0] > now:
+                self._entries.move_to_end((key, max_results)); return [dict(s) for s in entry[1]]
+            if entry: del self._entries[(key, max_results)]
+            if not self.path: return None
+            try:
+                row = self._db().execute('SELECT expires, data FROM suggestions WHERE key = ? AND max_results = ?', (key, max_results)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if not row or row[0] <= now: return None
+            data = json.loads(row[1]); self._store(key, max_results, row[0], data)
+            return [dict(s) for s in data]
+
+    def put(self, key: str, max_results: int, suggestions: list):
+        expires = time.time() + (self.ttl if suggestions else self.negative_ttl)
+        data = [dict(s) for s in suggestions]
+        with self._lock:
+            self._store(key, max_results, expires, data)
+            if self.path:
+                try: self._db().execute('INSERT OR REPLACE INTO suggestions VALUES (?, ?, ?, ?)', (key, max_results, expires, json.dumps(data)))
+                except sqlite3.Error: pass
+
+    def _store(self, key, max_results, expires, data):
+        self._entries[(key, max_results)] = (expires, data); self._entries.move_to_end((key, max_results))
+        while len(self._entries) > self.size: self._entries.popitem(last=False)
+
+SUGGESTION_CACHE = SuggestionCache()
+
+SUGGEST_SESSIONS_SIZE = int(os.getenv('SUGGEST_SESSIONS_SIZE', '4096'))
+
+class SuggestCancelled(Exception):
+    """The /suggest caller went away or typed past this query before Genius was asked."""
+
+class SuggestSessions:
+    """Highest /suggest sequence number seen per browser tab, so older queries can tell they were superseded."""
+    def __init__(self, size=SUGGEST_SESSIONS_SIZE):
+        self.size = size
+        self._latest: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, sid: str, seq: int):
+        with self._lock:
+            self._latest[sid] = max(seq, self._latest.get(sid, seq)); self._latest.move_to_end(sid)
+            while len(self._latest) > self.size: self._latest.popitem(last=False)
+
+    def superseded(self, sid: str, seq: int) -> bool:
+        with self._lock:
+            return self._latest.get(sid, seq) > seq
+
+SUGGEST_SESSIONS = SuggestSessions()
+
+def local_suggestions(query: str, max_results: int = 5) -> list[dict]:
+    """Instant suggestions from SONG_INDEX (songs resolved before, cached or in the library); no network."""
+    hits = SONG_INDEX.search(query, max_results)
+    for s in hits:
+        if is_library_url(s['url']): s['source'] = 'library'
+    return hits
+
+def _merge_suggestions(first: list[dict], more: list[dict], max_results: int) -> list[dict]:
+    seen = {(search_key(s['title']), search_key(s['artist'])) for s in first}
+    return (first + [s for s in more if (search_key(s['title']), search_key(s['artist'])) not in seen])[:max_results]
+
+def get_suggestions(query: str, max_results: int = 5, cancelled=None):
+    """
+    Cached Genius suggestions for query. ``cancelled`` is an optional callable polled
+    before each Genius call; when it returns True, SuggestCancelled is raised and nothing is cached.
+    """
+    # Local library songs come first; an exact title match (or a full page) skips Genius entirely.
+    local = LYRICS_LIBRARY.suggestions(query, max_results)
+    if len(local) >= max_results or (local and LYRICS_LIBRARY.lookup_query(query)): return local
+    key = normalize_query(query)
+    suggestions = SUGGESTION_CACHE.get(key, max_results)
+    if suggestions is None:
+        if cancelled and cancelled(): raise SuggestCancelled(query)
+        with GENIUS_POOL.client() as genius:
+            suggestions, complete = _get_suggestions(genius, query, max_results, cancelled)
+        # a failed Genius call (timeout, 5xx, rate limit) is not a real "no results": don't cache it
+        if complete: SUGGESTION_CACHE.put(key, max_results, suggestions)
+        SONG_INDEX.add_many(suggestions)
+    # Genius leads; songs we already know fill any remaining slots.
+    return _merge_suggestions(_merge_suggestions(local, suggestions, max_results), local_suggestions(query, max_results), max_results)
+
+def _get_suggestions(genius, query: str, max_results: int, cancelled=None):
+    """(suggestions, complete); ``complete`` is False when a Genius call failed, so the answer must not be cached."""
+    # borrowing a client may have waited on the pool, so ask again before going out
+    if cancelled and cancelled(): raise SuggestCancelled(query)
+    complete = True
     try:
         search_results = genius.search_songs(query, per_page=max_results); hits = search_results.get('hits', []) if search_results else []
-    except Exception: hits = []
+    except Exception: hits = []; complete = False
     suggestions = []
     if not hits:
+        if cancelled and cancelled(): raise SuggestCancelled(query)
         try: song_obj = genius.search_song(query)
-        except Exception: song_obj = None
+        except Exception: song_obj = None; complete = False
         if song_obj: suggestions.append({'title': song_obj.title, 'artist': song_obj.artist, 'url': song_obj.url})
-        return suggestions
-    WORSHIP_KEYWORDS = ['worship','praise','christ','jesus','god','hillsong','bethel','church','faith','grace','redeemer','lord','holy','gospel','alive','blessing','spirit','hope','saved']
-    for hit in hits:
+        return suggestions, complete
+    for hit, score in zip(hits, WORSHIP_SCORER.score_hits(hits)):
         result = hit.get('result', {})
         title = result.get('title', ''); artist = result.get('primary_artist', {}).get('name', '')
         url = result.get('url', None); art = result.get('song_art_image_thumbnail_url') or result.get('header_image_thumbnail_url') or None
-        combined = f"{title} {artist}".lower(); score = sum(1 for kw in WORSHIP_KEYWORDS if kw in combined)
         suggestions.append({'title': title, 'artist': artist, 'url': url, 'thumbnail': art, 'gid': result.get('id'), 'score': score})
     suggestions.sort(key=lambda s: s['score'], reverse=True)
     for s in suggestions: s.pop('score', None)
-    return suggestions[:max_results]
+    return suggestions[:max_results], complete
 
 def fetch_lyrics_by_selection(title: str, artist: str, url: str | None) -> str:
-    token = os.getenv('GENIUS_ACCESS_TOKEN')
-    genius = Genius(token, skip_non_songs=True, excluded_terms=['(Remix)', '(Live)'], remove_section_headers=True, timeout=15, retries=3)
-    lyrics = None
-    if url:
-        try: lyrics = genius.lyrics(song_url=url)
-        except Exception: lyrics = None
-    if not lyrics:
-        try: song_obj = genius.search_song(title, artist)
-        except Exception: song_obj = None
-        if song_obj and song_obj.lyrics: lyrics = song_obj.lyrics
+    lyrics = lyrics_to_slides_improved.fetch_song_lyrics(title, artist, url)
     if not lyrics: raise ValueError(f"Could not retrieve lyrics for {title} {('by ' + artist) if artist else ''}")
     return lyrics
 
 
 def fetch_lyrics_with_headers(title: str, artist: str, url: str | None) -> str:
     """Fetch lyrics from Genius but KEEP section headers (e.g., [Verse 1], [Chorus])."""
-    token = os.getenv('GENIUS_ACCESS_TOKEN')
-    genius = Genius(token, skip_non_songs=True, excluded_terms=[..., '(Live)'], remove_section_headers=False, timeout=15, retries=3)
-    lyrics = None
-    if url:
-        try:
-            lyrics = genius.lyrics(song_url=url)
-        except Exception:
-            lyrics = None
-    if not lyrics:
-        try:
-            song_obj = genius.search_song(title, artist)
-        except Exception:
-            song_obj = None
-        if song_obj and song_obj.lyrics:
-            lyrics = song_obj.lyrics
+    lyrics = lyrics_to_slides_improved.fetch_song_lyrics(title, artist, url, remove_section_headers=False)
     if not lyrics:
         raise ValueError(f"Could not retrieve lyrics (with headers) for {title} {('by ' + artist) if artist else ''}")
     return lyrics
 
 
-SECTION_ALIASES = {
-    'VERSE': ['VERSE', 'VS', 'V'],
-    'CHORUS': ['CHORUS', 'CHO', 'C', 'REFRAIN'],
-    'PRE-CHORUS': ['PRE-CHORUS', 'PRECHORUS', 'PRE CHORUS', 'PRE-CHO', 'PRE', 'BUILD'],
-    'BRIDGE': ['BRIDGE', 'BRG', 'B'],
-    'TAG': ['TAG', 'OUTRO', 'CODA', 'ENDING'],
-    'INTRO': ['INTRO', 'INSTRUMENTAL', 'INTERLUDE'],
-    'INSTRUMENTAL': ['INSTRUMENTAL', 'INTERLUDE'],
-    'REFRAIN': ['REFRAIN'],
-    'OUTRO': ['OUTRO'],
-}
-
-def _normalize_section_label(raw: str) -> str:
-    s = re.sub(r'[^A-Za-z0-9\-\s]', '', raw or '').strip().upper()
-    s = s.replace('  ', ' ')
-    for canon, aliases in SECTION_ALIASES.items():
-        for a in aliases:
-            if s.startswith(a):
-                return s  # keep any numbering, e.g., "VERSE 2"
-    return s or 'SECTION'
-
-def parse_lyrics_sections(lyrics: str) -> list[dict]:
+# Lines matching any of these (case-insensitively) are Genius page furniture, not lyrics.
+IGNORE_PATTERNS = [
+    r'you might also like', r'translation', r'translations', r'contributors?', r'lyrics\b',
+    r'embed$', r'copyright', r'contributor', r'powered by',
+    r'^\s*produced by\b',
+    r'^\s*writ(?:ten|er)s?\s+by\b',
+    r'^\s*release date\b',
+    r'^\s*album\b',
+    r'^\s*genius\b',
+    r'^\s*urlcopyembed\b',
+    r'^\s*embedshare\b',
+    r'^\s*\d+\s*embed$',
+    r'^\s*\d+\s*$',
+    r'^\s*\[[^\]]*official[^\]]*\]\s*$',
+    r'^\s*\([^)]+\)\s*$',
+]
+# One alternation instead of a search per pattern: a line matches it exactly
+# when it matches some pattern on its own.
+_IGNORE_RE = re.compile('|'.join(f'(?:{pat})' for pat in IGNORE_PATTERNS))
+_HEADER_RE = re.compile(r'^\[(.+?)\]\s*$')
+
+LYRICS_PREVIEW_LINES = 12
+NORMALIZED_CACHE_SIZE = int(os.getenv('NORMALIZED_CACHE_SIZE', '256'))
+_PREVIEW_SKIP_PREFIXES = ('produced by', 'written by', 'release date', 'album', 'genius')
+
+def _normalize_lyrics(lyrics: str) -> dict:
     """
-    Parse Genius-style lyrics with headers like [Verse 1], [Chorus].
-    Returns a list of dicts: {{'label': 'VERSE 1', 'text': 'LINE\nLINE\n...'}}
+    Tokenise Genius-style lyrics (headers like [Verse 1], [Chorus]) in a single pass.
+    Returns {'sections': [{'label': 'VERSE 1', 'text': 'LINE\nLINE\n...'}, ...],
+             'slides': [['LINE', 'LINE'], ...],  # default two-line slides
+             'preview': ['LINE', ...]}           # first section with displayable lines
+    Each line is classified once (blank, ignored, header or lyric).
     """
-    IGNORE_PATTERNS = [
-        r'you might also like', r'translation', r'translations', r'contributors?', r'lyrics\b',
-        r'embed$', r'copyright', r'contributor', r'powered by',
-        r'^\s*produced by\b',
-        r'^\s*writ(?:ten|er)s?\s+by\b',
-        r'^\s*release date\b',
-        r'^\s*album\b',
-        r'^\s*genius\b',
-        r'^\s*urlcopyembed\b',
-        r'^\s*embedshare\b',
-        r'^\s*\d+\s*embed$',
-        r'^\s*\d+\s*$',
-        r'^\s*\[[^\]]*official[^\]]*\]\s*$',
-        r'^\s*\([^)]+\)\s*$',
-    ]
-    lines = [ln.strip() for ln in lyrics.splitlines()]
-    # remove empty and ignored
-    cleaned = []
-    for ln in lines:
+    ignore = _IGNORE_RE.search; header = _HEADER_RE.match
+    sections = []; lines = []; preview = []
+    current_label = 'SECTION'
+    buf = []; shown = []
+    for raw in lyrics.splitlines():
+        ln = raw.strip()
         if not ln:
             continue
         low = ln.lower()
-        if any(re.search(pat, low) for pat in IGNORE_PATTERNS):
+        if ignore(low):
             continue
-        cleaned.append(ln)
-
-    sections = []
-    current_label = 'SECTION'
-    buf = []
-    header_re = re.compile(r'^\[(.+?)\]\s*$')
-    for ln in cleaned:
-        m = header_re.match(ln)
+        m = header(ln)
         if m:
             # flush previous
             if buf:
-                sections.append({'label': _normalize_section_label(current_label), 'text': '\n'.join(buf).strip()})
-                buf = []
+                sections.append({'label': _normalize_section_label(current_label), 'text': '\n'.join(buf)})
+                if not preview: preview = shown
+                buf = []; shown = []
             current_label = m.group(1)
             continue
-        buf.append(ln)
-    if buf:
-        sections.append({'label': _normalize_section_label(current_label), 'text': '\n'.join(buf).strip()})
-
-    # If we didn't find headers, return a single section
-    if not sections:
-        joined = '\n'.join(cleaned).strip().upper()
-        if joined:
-            sections = [{'label': 'SECTION', 'text': joined}]
-    else:
         # uppercase text for consistency with slides
-        for s in sections:
-            s['text'] = '\n'.join([t.upper() for t in s['text'].splitlines() if t.strip()])
+        up = ln.upper()
+        buf.append(up); lines.append(up)
+        # the preview also drops stray credits and punctuation-only lines
+        if not low.startswith(_PREVIEW_SKIP_PREFIXES) and (len(ln) > 2 or ln.isalpha()):
+            shown.append(up)
+    if buf:
+        sections.append({'label': _normalize_section_label(current_label), 'text': '\n'.join(buf)})
+        if not preview: preview = shown
+    slides = [lines[i:i + 2] for i in range(0, len(lines), 2)]
+    return {'sections': sections, 'slides': slides, 'preview': preview}
+
+_NORMALIZED: OrderedDict[bytes, dict] = OrderedDict()
+_NORMALIZED_LOCK = threading.Lock()
+
+def normalize_lyrics(lyrics: str) -> dict:
+    """_normalize_lyrics memoised by content hash; the result is shared, so treat it as read-only."""
+    key = hashlib.blake2b((lyrics or '').encode('utf-8'), digest_size=16).digest()
+    with _NORMALIZED_LOCK:
+        result = _NORMALIZED.get(key)
+        if result is not None:
+            _NORMALIZED.move_to_end(key); return result
+    result = _normalize_lyrics(lyrics or '')
+    with _NORMALIZED_LOCK:
+        _NORMALIZED[key] = result
+        while len(_NORMALIZED) > NORMALIZED_CACHE_SIZE: _NORMALIZED.popitem(last=False)
+    return result
+
+def parse_lyrics_sections(lyrics: str) -> list[dict]:
+    """
+    Parse Genius-style lyrics with headers like [Verse 1], [Chorus].
+    Returns a list of dicts: {'label': 'VERSE 1', 'text': 'LINE\nLINE\n...'}
+    """
+    return _normalize_lyrics(lyrics)['sections']
+
+
+def song_metadata(gid: str, title: str, artist: str, url: str | None) -> dict:
+    """Title/artist/album/date/url/thumbnail for the song-info modal."""
+    if is_library_url(url):
+        local = LYRICS_LIBRARY.resolve(url)
+        return {'title': local['title'], 'artist': local['artist'], 'source': 'library'} if local else {'title': title, 'artist': artist}
+    data = {}
+    with GENIUS_POOL.client(excluded_terms=None, remove_section_headers=False) as genius:
+        # Prefer song endpoint when id is present
+        if gid:
+            try:
+                resp = genius.song(gid)
+                song_json = (resp or {}).get('song', {})
+                data['title'] = song_json.get('title') or title
+                data['artist'] = (song_json.get('primary_artist') or {}).get('name') or artist
+                data['album'] = (song_json.get('album') or {}).get('name')
+                data['release_date'] = song_json.get('release_date_for_display') or song_json.get('release_date')
+                data['url'] = song_json.get('url') or url
+                data['thumbnail'] = song_json.get('song_art_image_url') or song_json.get('header_image_thumbnail_url')
+            except Exception:
+                pass
+        # Fallback via search if we still lack basics
+        if not data.get('url'):
+            try:
+                song_obj = genius.search_song(title, artist)
+                if song_obj:
+                    data['title'] = data.get('title') or song_obj.title
+                    data['artist'] = data.get('artist') or getattr(song_obj, 'artist', artist)
+                    data['url'] = data.get('url') or getattr(song_obj, 'url', None)
+                    data['thumbnail'] = data.get('thumbnail') or getattr(song_obj, 'song_art_image_url', None)
+            except Exception:
+                pass
+    return data
+
+
+def lyrics_preview(title: str, artist: str, url: str | None, max_lines: int = LYRICS_PREVIEW_LINES) -> str:
+    """Short, clean lyric excerpt for the song-info modal."""
+    try:
+        lyr = fetch_lyrics_with_headers(title, artist, url)
+        return '\n'.join(normalize_lyrics(lyr)['preview'][:max_lines])
+    except Exception:
+        return ''
+
+
+def create_setlist_presentation_no_launch(service, setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]], on_chunk=None, song_backgrounds=None):
+    return lyrics_to_slides_improved.write_deck(service, setlist_title, songs_slides, on_chunk=on_chunk, song_backgrounds=song_backgrounds)
+
+LYRICS_FETCH_WORKERS = int(os.getenv('LYRICS_FETCH_WORKERS', '4'))
+# Shared by every /generate request, so this also caps in-flight Genius scrapes server-wide.
+LYRICS_FETCH_POOL = ThreadPoolExecutor(max_workers=LYRICS_FETCH_WORKERS, thread_name_prefix='lyrics-fetch')
+
+def _sanitize_slides(slides_obj):
+    out = []
+    for pair in slides_obj or []:
+        if not isinstance(pair, list):
+            continue
+        lines = []
+        for s in pair:
+            if isinstance(s, str):
+                t = s.strip()
+                if t:
+                    lines.append(t.upper())
+            if len(lines) == 2:
+                break
+        if lines:
+            out.append(lines)
+    return out
+
+def song_slides(song: dict) -> tuple[str, list[list[str]]]:
+    """(query string, slides) for one /generate song, fetching lyrics unless custom slides were sent."""
+    title = song.get('title', '').strip()
+    artist = song.get('artist', '').strip()
+    url = song.get('url')
+    custom = song.get('customSlides')
+    slides = _sanitize_slides(custom) if custom and isinstance(custom, list) else []
+    if not slides:
+        lyrics = fetch_lyrics_by_selection(title, artist, url)
+        slides = lyrics_to_slides_improved.format_lyrics(lyrics)
+        SONG_INDEX.add(title, artist, url)
+    query_string = f"{title} – {artist}".strip(' –')
+    return query_string, slides
+
+def _timed_song_slides(song: dict):
+    start = time.perf_counter()
+    return song_slides(song), time.perf_counter() - start
+
+def fetch_setlist_slides(songs: list[dict], on_song=None, cancelled: threading.Event | None = None):
+    """
+    Build slides for every song concurrently on LYRICS_FETCH_POOL.
+    Returns (songs_slides in setlist order, failures) where each failure is
+    {'index', 'title', 'error'}; a failed song is left out of the deck.
+    ``on_song(index, title, future)`` is called as each song finishes.
+    Setting ``cancelled`` drops the songs that have not started yet.
+    """
+    futures = [LYRICS_FETCH_POOL.submit(_timed_song_slides, song) for song in songs]
+    if on_song:
+        for idx, (song, fut) in enumerate(zip(songs, futures)):
+            fut.add_done_callback(lambda f, i=idx, t=song.get('title', ''): on_song(i, t, f))
+    songs_slides, failures = [], []
+    for idx, (song, fut) in enumerate(zip(songs, futures)):
+        if cancelled is not None:
+            while not fut.done() and not cancelled.wait(0.1): pass
+            if cancelled.is_set():
+                for f in futures: f.cancel()
+                return songs_slides, failures
+        try:
+            songs_slides.append(fut.result()[0])
+        except Exception as e:
+            failures.append({'index': idx, 'title': song.get('title', ''), 'error': str(e)})
+    return songs_slides, failures
 
-    return sections
+GENERATE_WORKERS = int(os.getenv('GENERATE_WORKERS', '2'))
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', '3600'))
 
+class JobCancelled(Exception):
+    pass
+
+class GenerationJob:
+    """
+    One queued /generate run: status, result and an append-only event log
+    that /progress subscribers can replay from the start.
+    """
+    def __init__(self, job_id: str):
+        self.job_id = job_id; self.status = 'pending'; self.songs = 0
+        self.result = None; self.error = None; self.future = None
+        self.events: list[dict] = []; self.finished = False; self.cancelled = threading.Event()
+        self.started = time.perf_counter(); self.created = self.touched = time.time()
+        self._cond = threading.Condition()
+
+    def emit(self, event: str, **data):
+        data['elapsed'] = round(time.perf_counter() - self.started, 3)
+        with self._cond:
+            self.events.append({'event': event, 'data': data}); self.touched = time.time()
+            if event in ('done', 'error', 'cancelled'): self.finished = True
+            self._cond.notify_all()
+
+    def wait_events(self, start: int, timeout: float) -> list[dict]:
+        with self._cond:
+            if len(self.events) <= start and not self.finished: self._cond.wait(timeout)
+            return self.events[start:]
+
+    def check_cancelled(self):
+        if self.cancelled.is_set(): raise JobCancelled('Job cancelled')
+
+    def to_dict(self) -> dict:
+        out = {'jobId': self.job_id, 'status': self.status, 'songs': self.songs, 'created': self.created}
+        if self.error: out['error'] = self.error
+        if self.result: out['result'] = self.result
+        return out
+
+class JobQueue:
+    """Registry of generation jobs run on a bounded worker pool."""
+    def __init__(self, workers: int = GENERATE_WORKERS, retention: float = JOB_RETENTION):
+        self.retention = retention; self._jobs: dict[str, GenerationJob] = {}; self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='generate')
+
+    def get(self, job_id: str, create: bool = True) -> GenerationJob | None:
+        with self._lock:
+            now = time.time()
+            for jid in [j for j, job in self._jobs.items() if (job.finished or job.future is None) and now - job.touched > self.retention]: del self._jobs[jid]
+            job = self._jobs.get(job_id)
+            if job is None and create: job = self._jobs[job_id] = GenerationJob(job_id)
+            return job
+
+    def submit(self, songs: list[dict], job_id: str | None = None) -> GenerationJob:
+        job = self.get(job_id or uuid.uuid4().hex)
+        with self._lock:
+            if job.future is not None: raise ValueError(f'Job {job.job_id} already exists')
+            job.status = 'queued'; job.songs = len(songs)
+            job.future = self._executor.submit(self._run, job, songs)
+        job.emit('queued', songs=len(songs))
+        return job
+
+    def _run(self, job: GenerationJob, songs: list[dict]):
+        try:
+            # cancelled after a worker already took the future: finish it like any other cancel
+            job.check_cancelled(); job.status = 'running'
+            job.result = generate_deck(songs, job); job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+            if not job.finished: job.emit('cancelled')
+        except Exception as e:
+            job.error = str(e); job.status = 'error'
+
+    def cancel(self, job_id: str) -> GenerationJob | None:
+        job = self.get(job_id, create=False)
+        if job is None or job.finished: return job
+        job.cancelled.set()
+        if job.future is not None and job.future.cancel():
+            job.status = 'cancelled'; job.emit('cancelled')
+        return job
+
+JOBS = JobQueue()
+
+def _deck_title() -> str:
+    try:
+        tz = ZoneInfo('America/Toronto'); now = datetime.datetime.now(tz)
+    except Exception:
+        now = datetime.datetime.now()
+    time_str = now.strftime('%I:%M%p').lstrip('0').lower()
+    return f"{now.strftime('%B')} {now.day} Setlist Generated at {time_str}"
 
-def create_setlist_presentation_no_launch(service, setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]]):
+def generate_deck(songs: list[dict], job: GenerationJob | None = None) -> dict:
+    """
+    Full /generate pipeline: fetch lyrics, authenticate, write slides.
+    When run for a job, emits progress events and stops with JobCancelled
+    at the next stage or chunk boundary after a cancel request.
+    """
+    emit = job.emit if job else (lambda event, **data: None)
+    check = job.check_cancelled if job else (lambda: None)
+    def on_chunk(stats, total):
+        emit('chunk', total=total, **stats); check()
     try:
-        presentation = service.presentations().create(body={'title': setlist_title}).execute()
-        pres_id = presentation['presentationId']; default_id = presentation['slides'][0]['objectId']
-        requests: list[dict] = []; requests.append({'deleteObject': {'objectId': default_id}})
-        requests += lyrics_to_slides_improved._make_title_slide('deck_title', setlist_title)
-        for sidx, (song_query, slides_content) in enumerate(songs_slides, start=1):
-            song_title, _ = lyrics_to_slides_improved.split_title_artist(song_query)
-            requests += lyrics_to_slides_improved._make_title_slide(f'song_title_{sidx}', song_title)
-            for idx, lines in enumerate(slides_content):
-                base_id = f'song{sidx}_slide{idx}'
-                requests += [
-                    {'createSlide': {'objectId': base_id, 'slideLayoutReference': {'predefinedLayout': 'BLANK'}}},
-                    {'updatePageProperties': {'objectId': base_id, 'pageProperties': {'pageBackgroundFill': {'stretchedPictureFill': {'contentUrl': lyrics_to_slides_improved.BACKGROUND_IMAGE_URL}}}, 'fields': 'pageBackgroundFill.stretchedPictureFill.contentUrl'}}
-                ]
-                bar_width = lyrics_to_slides_improved.SLIDE_WIDTH * lyrics_to_slides_improved.BOX_WIDTH_RATIO
-                x_off = (lyrics_to_slides_improved.SLIDE_WIDTH - bar_width) / 2
-                count = len(lines); total_h = count * lyrics_to_slides_improved.BOX_HEIGHT + (count - 1) * lyrics_to_slides_improved.BOX_SPACING
-                y_off = (lyrics_to_slides_improved.SLIDE_HEIGHT - total_h) / 2
-                for j, line in enumerate(lines):
-                    bar_id = f'{base_id}_bar{j}'; txt_id = f'{base_id}_txt{j}'
-                    y = y_off + j * (lyrics_to_slides_improved.BOX_HEIGHT + lyrics_to_slides_improved.BOX_SPACING)
-                    requests += [
-                        {'createShape': {'objectId': bar_id, 'shapeType': 'RECTANGLE', 'elementProperties': {'pageObjectId': base_id, 'size': {'width': {'magnitude': bar_width, 'unit': 'PT'}, 'height': {'magnitude': lyrics_to_slides_improved.BOX_HEIGHT, 'unit': 'PT'}}, 'transform': {'scaleX': 1, 'scaleY': 1, 'translateX': x_off, 'translateY': y, 'unit': 'PT'}}}},
-                        {'updateShapeProperties': {'objectId': bar_id, 'shapeProperties': {'shapeBackgroundFill': {'solidFill': {'color': {'rgbColor': {'red': 1, 'green': 1, 'blue': 1}}, 'alpha': lyrics_to_slides_improved.BOX_ALPHA}}, 'outline': {'propertyState': 'NOT_RENDERED'}}, 'fields': 'shapeBackgroundFill.solidFill.color,shapeBackgroundFill.solidFill.alpha,outline.propertyState'}},
-                        {'createShape': {'objectId': txt_id, 'shapeType': 'TEXT_BOX', 'elementProperties': {'pageObjectId': base_id, 'size': {'width': {'magnitude': bar_width - 2 * lyrics_to_slides_improved.TEXT_INSET, 'unit': 'PT'}, 'height': {'magnitude': lyrics_to_slides_improved.BOX_HEIGHT - 2 * lyrics_to_slides_improved.TEXT_INSET, 'unit': 'PT'}}, 'transform': {'scaleX': 1, 'scaleY': 1, 'translateX': x_off + lyrics_to_slides_improved.TEXT_INSET, 'translateY': y + lyrics_to_slides_improved.TEXT_INSET, 'unit': 'PT'}}}},
-                        {'updateShapeProperties': {'objectId': txt_id, 'shapeProperties': {'shapeBackgroundFill': {'solidFill': {'alpha': 0}}, 'outline': {'propertyState': 'NOT_RENDERED'}, 'contentAlignment': 'MIDDLE'}, 'fields': 'shapeBackgroundFill.solidFill.alpha,outline.propertyState,contentAlignment'}},
-                        {'insertText': {'objectId': txt_id, 'insertionIndex': 0, 'text': line}},
-                        {'updateTextStyle': {'objectId': txt_id, 'style': {'fontFamily': 'Calibri', 'fontSize': {'magnitude': lyrics_to_slides_improved.FONT_SIZE, 'unit': 'PT'}, 'foregroundColor': {'opaqueColor': {'rgbColor': {'red': 1, 'green': 1, 'blue': 1}}}, 'bold': False}, 'textRange': {'type': 'ALL'}, 'fields': 'fontFamily,fontSize,foregroundColor,bold'}},
-                        {'updateParagraphStyle': {'objectId': txt_id, 'style': {'alignment': 'CENTER', 'lineSpacing': 100}, 'textRange': {'type': 'ALL'}, 'fields': 'alignment,lineSpacing'}}
-                    ]
-        service.presentations().batchUpdate(presentationId=pres_id, body={'requests': requests}).execute()
-        url = f"https://docs.google.com/presentation/d/{pres_id}/edit"
-        return url
+        stage_start = time.perf_counter(); emit('stage', stage='fetch', songs=len(songs))
+        def on_song(idx, title, fut):
+            if fut.cancelled(): return
+            if fut.exception(): emit('song', index=idx, title=title, ok=False, error=str(fut.exception()))
+            else: emit('song', index=idx, title=title, ok=True, seconds=round(fut.result()[1], 3), slides=len(fut.result()[0][1]))
+        songs_slides, failures = fetch_setlist_slides(songs, on_song, job.cancelled if job else None)
+        check()
+        if not songs_slides: raise ValueError('Could not retrieve lyrics for any song: ' + '; '.join(f['error'] for f in failures))
+        emit('stage_done', stage='fetch', seconds=round(time.perf_counter() - stage_start, 3))
+        stage_start = time.perf_counter(); emit('stage', stage='authenticate')
+        svc = lyrics_to_slides_improved.authenticate()
+        emit('stage_done', stage='authenticate', seconds=round(time.perf_counter() - stage_start, 3)); check()
+        stage_start = time.perf_counter(); emit('stage', stage='slides')
+        # Optional per-song 'background' image URLs, aligned with the songs that made it into the deck.
+        failed = {f['index'] for f in failures}
+        backgrounds = [song.get('background') or None for idx, song in enumerate(songs) if idx not in failed]
+        url = create_setlist_presentation_no_launch(svc, _deck_title(), songs_slides,
+                                                    on_chunk=on_chunk, song_backgrounds=backgrounds)
+        emit('stage_done', stage='slides', seconds=round(time.perf_counter() - stage_start, 3))
+    except JobCancelled:
+        emit('cancelled'); raise
     except Exception as e:
-        raise
+        emit('error', message=str(e)); raise
+    response = {'status': 'ok', 'url': url, 'failed': failures}
+    emit('done', **response)
+    return response
+
+SONGINFO_DEADLINE = float(os.getenv('SONGINFO_DEADLINE', '8'))
+TASK_POOL = ThreadPoolExecutor(max_workers=int(os.getenv('FANOUT_WORKERS', '16')), thread_name_prefix='fanout')
 
 class SongRequestHandler(http.server.SimpleHTTPRequestHandler):
+    def _send_asset(self, asset: StaticAsset, head: bool = False):
+        inm = self.headers.get('If-None-Match', '')
+        if asset.etag in inm or inm.strip() == '*':
+            self.send_response(304); self.send_header('ETag', asset.etag); self.send_header('Cache-Control', asset.cache_control)
+            self.end_headers(); return
+        encoding = asset.negotiate(self.headers.get('Accept-Encoding', ''))
+        body = asset.bodies[encoding]
+        self.send_response(200); self.send_header('Content-Type', asset.content_type)
+        self.send_header('Content-Length', str(len(body))); self.send_header('ETag', asset.etag)
+        self.send_header('Cache-Control', asset.cache_control); self.send_header('Vary', 'Accept-Encoding')
+        if encoding != 'identity': self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        if not head: self.wfile.write(body)
+
+    def _client_gone(self) -> bool:
+        """True once the browser has closed the connection, e.g. after an aborted fetch."""
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+        except (OSError, ValueError):
+            return True
+
+    def do_HEAD(self):
+        path = urllib.parse.urlparse(self.path).path
+        if path in STATIC_ASSETS:
+            self._send_asset(STATIC_ASSETS[path], head=True)
+        else:
+            self.send_response(404); self.send_header('Content-Type', 'application/json'); self.end_headers()
+
     def do_GET(self):
         parsed = urllib.parse.urlparse(self.path); path = parsed.path
-        if path == '/':
-            self.send_response(200); self.send_header('Content-Type', 'text/html; charset=utf-8'); self.end_headers()
-            self.wfile.write(INDEX_HTML.encode('utf-8'))
+        if path in STATIC_ASSETS:
+            self._send_asset(STATIC_ASSETS[path])
+        elif path == '/suggest' and urllib.parse.parse_qs(parsed.query).get('local') == ['1']:
+            # index-only answer the page can show while Genius is still being asked
+            query = urllib.parse.parse_qs(parsed.query).get('q', [''])[0]
+            self.send_response(200); self.send_header('Content-Type', 'application/json'); self.end_headers()
+            self.wfile.write(json.dumps({'suggestions': local_suggestions(query)}).encode('utf-8'))
         elif path == '/suggest':
             params = urllib.parse.parse_qs(parsed.query); query = params.get('q', [''])[0]
+            sid = params.get('sid', [''])[0]; seq = params.get('seq', ['0'])[0]
+            seq = int(seq) if seq.isdigit() else 0
+            if sid: SUGGEST_SESSIONS.begin(sid, seq)
+            cancelled = lambda: bool(sid) and SUGGEST_SESSIONS.superseded(sid, seq) or self._client_gone()
             try:
-                suggestions = get_suggestions(query)
+                suggestions = get_suggestions(query, cancelled=cancelled)
                 self.send_response(200); self.send_header('Content-Type', 'application/json'); self.end_headers()
                 self.wfile.write(json.dumps({'suggestions': suggestions}).encode('utf-8'))
+            except SuggestCancelled:
+                if self._client_gone(): self.close_connection = True; return
+                self.send_response(409); self.send_header('Content-Type', 'application/json'); self.end_headers()
+                self.wfile.write(json.dumps({'error': 'Superseded by a newer query'}).encode('utf-8'))
             except Exception as e:
                 self.send_response(500); self.send_header('Content-Type', 'application/json'); self.end_headers()
                 self.wfile.write(json.dumps({'error': str(e)}).encode('utf-8'))
+        elif path == '/progress':
+            # Server-Sent Events for one /generate run, identified by the jobId the client posts with it.
+            job_id = urllib.parse.parse_qs(parsed.query).get('job', [''])[0]
+            if not job_id:
+                self.send_response(400); self.send_header('Content-Type', 'application/json'); self.end_headers()
+                self.wfile.write(json.dumps({'error': 'No job provided'}).encode('utf-8')); return
+            # Every stream pins a worker for the whole run, so only some of the pool may stream;
+            # the page falls back to polling /jobs/<id> when it is turned away.
+            slots = getattr(self.server, 'sse_slots', None)
+            if slots is not None and not slots.acquire(blocking=False):
+                self.send_response(503); self.send_header('Content-Type', 'application/json'); self.send_header('Retry-After', '5'); self.end_headers()
+                self.wfile.write(json.dumps({'error': 'Too many progress streams'}).encode('utf-8')); return
+            progress = JOBS.get(job_id); sent = 0; opened = time.monotonic()
+            self.send_response(200); self.send_header('Content-Type', 'text/event-stream'); self.send_header('Cache-Control', 'no-cache'); self.end_headers()
+            try:
+                while True:
+                    events = progress.wait_events(sent, timeout=15 if progress.future else min(15, PROGRESS_SUBMIT_DEADLINE))
+                    if not events:
+                        if progress.finished: break
+                        if progress.future is None and time.monotonic() - opened >= PROGRESS_SUBMIT_DEADLINE:
+                            # no /generate ever claimed this id: don't hold the worker any longer
+                            self.wfile.write(b'event: error\ndata: {"message": "Job was never submitted"}\n\n'); self.wfile.flush(); break
+                        self.wfile.write(b': keep-alive\n\n'); self.wfile.flush(); continue
+                    for ev in events:
+                        self.wfile.write(f"event: {ev['event']}\ndata: {json.dumps(ev['data'])}\n\n".encode('utf-8'))
+                    self.wfile.flush(); sent += len(events)
+                    if progress.finished and sent >= len(progress.events): break
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                if slots is not None: slots.release()
+        elif path.startswith('/jobs/'):
+            parts = path.strip('/').split('/'); job = JOBS.get(parts[1], create=False) if len(parts) > 1 else None
+            if job is None or job.future is None or len(parts) > 3 or (len(parts) == 3 and parts[2] != 'result'):
+                self.send_response(404); self.send_header('Content-Type', 'application/json'); self.end_headers()
+                self.wfile.write(json.dumps({'error': 'Not found'}).encode('utf-8')); return
+            body = job.to_dict(); code = 200
+            if len(parts) == 3:
+                # Result: 200 once done, 202 while pending, 409 for failed or cancelled jobs.
+                body = job.result if job.status == 'done' else body
+                code = 200 if job.status == 'done' else 202 if job.status in ('queued', 'running') else 409
+            self.send_response(code); self.send_header('Content-Type', 'application/json'); self.end_headers()
+            self.wfile.write(json.dumps(body).encode('utf-8'))
         elif path == '/color':
             params = urllib.parse.parse_qs(parsed.query); art_url = params.get('url', [''])[0]
             if not art_url:
@@ -1838,11 +2402,10 @@ class SongRequestHandler(http.server.SimpleHTTPRequestHandler):
             try:
                 # fetch WITH headers to preserve [Chorus], [Bridge], etc.
                 lyrics_raw = fetch_lyrics_with_headers(title, artist, url)
-                sections = parse_lyrics_sections(lyrics_raw)
-                # Also provide default slides as a fallback
-                slides = lyrics_to_slides_improved.format_lyrics(lyrics_raw)
+                # sections plus default slides as a fallback, from one (memoised) pass
+                norm = normalize_lyrics(lyrics_raw)
                 self.send_response(200); self.send_header('Content-Type', 'application/json'); self.end_headers()
-                self.wfile.write(json.dumps({'sections': sections, 'slides': slides}).encode('utf-8'))
+                self.wfile.write(json.dumps({'sections': norm['sections'], 'slides': norm['slides']}).encode('utf-8'))
             except Exception as e:
                 self.send_response(500); self.send_header('Content-Type', 'application/json'); self.end_headers()
                 self.wfile.write(json.dumps({'error': str(e)}).encode('utf-8'))
@@ -1853,73 +2416,37 @@ class SongRequestHandler(http.server.SimpleHTTPRequestHandler):
             artist = params.get('artist', [''])[0]
             url = params.get('url', [''])[0] or None
             try:
-                token = os.getenv('GENIUS_ACCESS_TOKEN')
-                genius = Genius(token, skip_non_songs=True, remove_section_headers=False, timeout=15, retries=3)
-                data = {}
-                # Prefer song endpoint when id is present
-                if gid:
-                    try:
-                        resp = genius.song(gid)
-                        song_json = (resp or {}).get('song', {})
-                        data['title'] = song_json.get('title') or title
-                        data['artist'] = (song_json.get('primary_artist') or {}).get('name') or artist
-                        data['album'] = (song_json.get('album') or {}).get('name')
-                        data['release_date'] = song_json.get('release_date_for_display') or song_json.get('release_date')
-                        data['url'] = song_json.get('url') or url
-                        data['thumbnail'] = song_json.get('song_art_image_url') or song_json.get('header_image_thumbnail_url')
-                    except Exception:
-                        pass
-                # Fallback via search if we still lack basics
-                if not data.get('url'):
-                    try:
-                        song_obj = genius.search_song(title, artist)
-                        if song_obj:
-                            data['title'] = data.get('title') or song_obj.title
-                            data['artist'] = data.get('artist') or getattr(song_obj, 'artist', artist)
-                            data['url'] = data.get('url') or getattr(song_obj, 'url', None)
-                            data['thumbnail'] = data.get('thumbnail') or getattr(song_obj, 'song_art_image_url', None)
-                    except Exception:
-                        pass
-                # Lyrics preview (short, clean)
-                preview = ''
-                try:
-                    lyr = fetch_lyrics_with_headers(data.get('title') or title,
-                                                   data.get('artist') or artist,
-                                                   data.get('url') or url)
-                    sections = parse_lyrics_sections(lyr)
-                    if sections:
-                        # take first non-empty section's first ~12 lines (filtering any leftover non-lyrics)
-                        for sec in sections:
-                            raw_lines = [ln.strip() for ln in sec.get('text','').splitlines() if ln.strip()]
-                            filt = []
-                            for ln in raw_lines:
-                                low = ln.lower()
-                                # drop any lingering metadata-like lines
-                                if low.startswith(('produced by','written by','release date','album','genius')):
-                                    continue
-                                if low.endswith('embed') or low.endswith('lyrics'):
-                                    continue
-                                if len(ln) <= 2 and not ln.isalpha():
-                                    continue
-                                if ln.startswith('[') and ln.endswith(']'):
-                                    continue
-                                filt.append(ln)
-                            if filt:
-                                preview = '\n'.join(filt[:12]).strip()
-                                break
-                except Exception:
-                    pass
-                data['preview'] = preview
-                # Extract palette from thumbnail for theming
-                colors = None
+                deadline = time.monotonic() + SONGINFO_DEADLINE
+                data = {}; futures = {}
+                # With the song URL already known the preview scrape can start
+                # while the metadata lookup is still in flight.
+                if url:
+                    futures['preview'] = TASK_POOL.submit(lyrics_preview, title, artist, url)
+                timed_out = []
                 try:
-                    art = data.get('thumbnail') or ''
-                    if art:
-                        light, dark = compute_gradient_colors(art)
-                        colors = {'light': light, 'dark': dark}
-                except Exception:
-                    pass
-                data['colors'] = colors
+                    data = TASK_POOL.submit(song_metadata, gid, title, artist, url).result(
+                        timeout=max(0.0, deadline - time.monotonic()))
+                except FuturesTimeout:
+                    timed_out.append('metadata')
+                # Lyrics preview and palette don't depend on each other: run
+                # them side by side and answer with whatever is ready by the
+                # deadline.
+                if 'preview' not in futures:
+                    futures['preview'] = TASK_POOL.submit(lyrics_preview, data.get('title') or title,
+                                                          data.get('artist') or artist, data.get('url') or url)
+                art = data.get('thumbnail') or ''
+                if art:
+                    futures['colors'] = TASK_POOL.submit(compute_gradient_colors, art)
+                wait(futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+                data['preview'] = ''; data['colors'] = None
+                for name, fut in futures.items():
+                    if not fut.done():
+                        timed_out.append(name); continue
+                    try: result = fut.result()
+                    except Exception: continue
+                    if name == 'preview': data['preview'] = result
+                    else: data['colors'] = {'light': result[0], 'dark': result[1]}
+                if timed_out: data['timed_out'] = timed_out
                 self.send_response(200); self.send_header('Content-Type', 'application/json'); self.end_headers()
                 self.wfile.write(json.dumps(data).encode('utf-8'))
             except Exception as e:
@@ -1937,66 +2464,124 @@ class SongRequestHandler(http.server.SimpleHTTPRequestHandler):
                 payload = json.loads(body.decode('utf-8')); songs = payload.get('songs', [])
                 if not isinstance(songs, list) or not songs: raise ValueError('No songs provided')
                 
-                songs_slides: list[tuple[str, list[list[str]]]] = []
-
-                def _sanitize_slides(slides_obj):
-                    out = []
-                    for pair in slides_obj or []:
-                        if not isinstance(pair, list):
-                            continue
-                        lines = []
-                        for s in pair:
-                            if isinstance(s, str):
-                                t = s.strip()
-                                if t:
-                                    lines.append(t.upper())
-                            if len(lines) == 2:
-                                break
-                        if lines:
-                            out.append(lines)
-                    return out
-
-                for song in songs:
-                    title = song.get('title', '').strip()
-                    artist = song.get('artist', '').strip()
-                    url = song.get('url')
-                    custom = song.get('customSlides')
-                    if custom and isinstance(custom, list) and len(custom) > 0:
-                        slides = _sanitize_slides(custom)
-                        if not slides:
-                            lyrics = fetch_lyrics_by_selection(title, artist, url)
-                            slides = lyrics_to_slides_improved.format_lyrics(lyrics)
-                    else:
-                        lyrics = fetch_lyrics_by_selection(title, artist, url)
-                        slides = lyrics_to_slides_improved.format_lyrics(lyrics)
-                    query_string = f"{title} – {artist}".strip(' –'); songs_slides.append((query_string, slides))
-                svc = lyrics_to_slides_improved.authenticate()
-                try:
-                    tz = ZoneInfo('America/Toronto'); now = datetime.datetime.now(tz)
-                except Exception:
-                    now = datetime.datetime.now()
-                time_str = now.strftime('%I:%M%p').lstrip('0').lower()
-                deck_title = f"{now.strftime('%B')} {now.day} Setlist Generated at {time_str}"
-                url = create_setlist_presentation_no_launch(svc, deck_title, songs_slides)
-                response = {'status': 'ok', 'url': url}
+                job = JOBS.submit(songs, str(payload.get('jobId') or '') or None)
+                if payload.get('wait'):
+                    # Blocking mode for scripts: hold the connection until the deck exists.
+                    job.future.result()
+                    if job.status != 'done': raise ValueError(job.error or f'Job {job.status}')
+                    response = job.result
+                else:
+                    response = {'status': 'queued', 'jobId': job.job_id}
                 self.send_response(200); self.send_header('Content-Type', 'application/json'); self.end_headers()
                 self.wfile.write(json.dumps(response).encode('utf-8'))
             except Exception as e:
                 self.send_response(500); self.send_header('Content-Type', 'application/json'); self.end_headers()
                 self.wfile.write(json.dumps({'status': 'error', 'message': str(e)}).encode('utf-8'))
+        elif parsed.path.startswith('/jobs/') and parsed.path.endswith('/cancel'):
+            job = JOBS.cancel(parsed.path.strip('/').split('/')[1])
+            if job is None:
+                self.send_response(404); self.send_header('Content-Type', 'application/json'); self.end_headers()
+                self.wfile.write(json.dumps({'error': 'Not found'}).encode('utf-8')); return
+            self.send_response(200); self.send_header('Content-Type', 'application/json'); self.end_headers()
+            self.wfile.write(json.dumps(job.to_dict()).encode('utf-8'))
         else:
             self.send_response(404); self.send_header('Content-Type', 'application/json'); self.end_headers()
             self.wfile.write(json.dumps({'error': 'Not found'}).encode('utf-8'))
 
-def run_server():
-    with socketserver.TCPServer(('127.0.0.1', 0), SongRequestHandler) as httpd:
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '8'))
+# /progress streams allowed at once (default: half the workers, always fewer than all of them,
+# so a single-worker server streams none and the page polls instead),
+# and how long a stream waits for its job to be POSTed to /generate before giving up.
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', '0'))
+PROGRESS_SUBMIT_DEADLINE = float(os.getenv('PROGRESS_SUBMIT_DEADLINE', '30'))
+
+class PooledHTTPServer(socketserver.TCPServer):
+    """TCPServer that hands each connection to a bounded pool of worker threads.
+
+    At most ``workers`` requests run at once; further connections wait in the
+    listen backlog until a worker frees up, so a slow /generate no longer
+    blocks /suggest or /color behind it.
+    """
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers: int = SERVER_WORKERS):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='http-worker')
+        self._slots = threading.BoundedSemaphore(self.workers)
+        streams = SSE_MAX_STREAMS or self.workers // 2
+        self.sse_slots = threading.BoundedSemaphore(max(0, min(streams, self.workers - 1)))
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except Exception:
+            self._slots.release(); self.shutdown_request(request)
+            raise
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request); self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+SONG_INDEX_SAVE_INTERVAL = float(os.getenv('SONG_INDEX_SAVE_INTERVAL', '60'))
+
+def _index_library():
+    SONG_INDEX.add_many({'title': s['title'], 'artist': s['artist'], 'url': f"{LIBRARY_URL_PREFIX}{s['id']}"} for s in LYRICS_LIBRARY.all())
+
+def _warm_song_index():
+    # Snapshot first (it carries thumbnails and Genius ids), then anything cached or imported since.
+    loaded = SONG_INDEX.load()
+    SONG_INDEX.add_many(lyrics_to_slides_improved.LYRICS_CACHE.songs()); _index_library()
+    print(f"♪ Song index ready: {len(SONG_INDEX)} songs ({loaded} from snapshot)")
+    while True:
+        time.sleep(SONG_INDEX_SAVE_INTERVAL); SONG_INDEX.save()
+
+def _sync_library():
+    try:
+        stats = LYRICS_LIBRARY.import_paths(LYRICS_LIBRARY_DIRS)
+        _index_library()
+        print(f"♪ Lyrics library synced: {', '.join(f'{v} {k}' for k, v in stats.items())}")
+    except Exception as e:
+        print(f"⚠️  Lyrics library sync failed: {e}")
+
+def _warm_slides():
+    # never the browser sign-in from here: that waits for the first deck
+    try:
+        lyrics_to_slides_improved.authenticate(interactive=False)
+    except Exception as e:
+        print(f"⚠️  Google Slides not ready yet: {e}")
+
+def run_server(workers: int | None = None):
+    workers = workers or SERVER_WORKERS
+    threading.Thread(target=_warm_song_index, daemon=True).start()
+    if LYRICS_LIBRARY_DIRS:
+        # Only files changed since the last import are re-read.
+        threading.Thread(target=_sync_library, daemon=True).start()
+    try:
+        GENIUS_POOL.warm(); GENIUS_POOL.warm(remove_section_headers=False)
+    except Exception as e:
+        print(f"⚠️  Genius client not ready: {e}")
+    if os.path.exists(lyrics_to_slides_improved.SLIDES_SERVICE.token_path):
+        # Build the Slides service (and refresh a stale token) off the request path.
+        threading.Thread(target=_warm_slides, daemon=True).start()
+    with PooledHTTPServer(('127.0.0.1', 0), SongRequestHandler, workers=workers) as httpd:
         port = httpd.server_address[1]; url = f'http://127.0.0.1:{port}/'
         try:
             import webbrowser; threading.Timer(0.5, lambda: webbrowser.open_new(url)).start()
         except Exception: pass
-        print(f"★ Worship Slides Generator running on {url}"); print("Press Ctrl+C to stop the server.")
+        print(f"★ Worship Slides Generator running on {url} ({workers} workers)"); print("Press Ctrl+C to stop the server.")
         try: httpd.serve_forever()
         except KeyboardInterrupt: print("\\nStopping server...")
+        finally: SONG_INDEX.save()
 
 if __name__ == '__main__':
     run_server()
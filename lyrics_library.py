@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Local lyrics library
+====================
+
+Bulk-imports folders of lyric files into a SQLite store so songs we hold
+locally (e.g. licensed in-house arrangements) never touch the network.  The
+web UI (``/suggest``, ``/lyrics``, ``/generate``) and the CLI look songs up
+here before asking Genius.
+
+Two file flavours are understood:
+
+* **Plain text** (``.txt``, ``.lyrics``).  Optional ``Title:`` / ``Artist:``
+  lines at the top; otherwise the file name is read as ``Title - Artist``.
+  Sections start at a ``[Verse 1]`` style header or a bare label line such as
+  ``Chorus`` or ``Verse 2:``.
+* **ChordPro** (``.cho``, ``.chopro``, ``.chordpro``, ``.crd``, ``.pro``).
+  ``{title}`` / ``{artist}`` (or ``{subtitle}``) directives, ``{start_of_*}``
+  environments, ``{comment: Verse 2}`` labels and ``{chorus}`` repeats.
+  Inline chords such as ``[G]`` are stripped.
+
+Section labels go through :func:`_normalize_section_label` and the shared
+``SECTION_ALIASES`` table, exactly as Genius headers do.  Re-importing a
+folder only re-reads files whose size or modification time changed, and
+files that have disappeared from an imported folder are dropped.
+
+Usage::
+
+    python lyrics_library.py import ~/Lyrics [more folders or files ...]
+    python lyrics_library.py search "oceans"
+    python lyrics_library.py list
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+SECTION_ALIASES = {
+    'VERSE': ['VERSE', 'VS', 'V'],
+    'CHORUS': ['CHORUS', 'CHO', 'C', 'REFRAIN'],
+    'PRE-CHORUS': ['PRE-CHORUS', 'PRECHORUS', 'PRE CHORUS', 'PRE-CHO', 'PRE', 'BUILD'],
+    'BRIDGE': ['BRIDGE', 'BRG', 'B'],
+    'TAG': ['TAG', 'OUTRO', 'CODA', 'ENDING'],
+    'INTRO': ['INTRO', 'INSTRUMENTAL', 'INTERLUDE'],
+    'INSTRUMENTAL': ['INSTRUMENTAL', 'INTERLUDE'],
+    'REFRAIN': ['REFRAIN'],
+    'OUTRO': ['OUTRO'],
+}
+
+_LABEL_STRIP_RE = re.compile(r'[^A-Za-z0-9\-\s]')
+
+def _normalize_section_label(raw: str) -> str:
+    s = _LABEL_STRIP_RE.sub('', raw or '').strip().upper()
+    s = s.replace('  ', ' ')
+    for canon, aliases in SECTION_ALIASES.items():
+        for a in aliases:
+            if s.startswith(a):
+                return s  # keep any numbering, e.g., "VERSE 2"
+    return s or 'SECTION'
+
+
+LYRICS_LIBRARY_PATH = os.getenv(
+    'LYRICS_LIBRARY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lyrics_library.sqlite3')
+)
+# Folders re-synced (incrementally) when the web server starts, separated by os.pathsep.
+LYRICS_LIBRARY_DIRS = [d for d in os.getenv('LYRICS_LIBRARY_DIRS', '').split(os.pathsep) if d.strip()]
+LIBRARY_URL_PREFIX = 'library:'
+
+LIBRARY_EXTENSIONS = {
+    '.txt': 'text', '.lyrics': 'text',
+    '.cho': 'chordpro', '.chopro': 'chordpro', '.chordpro': 'chordpro', '.crd': 'chordpro', '.pro': 'chordpro',
+}
+
+def _label_re(names) -> re.Pattern:
+    alternation = '|'.join(re.escape(n) for n in sorted(set(names), key=len, reverse=True))
+    return re.compile(rf'^(?:{alternation})[\s\dx×()]*:?$', re.I)
+
+# A whole line that is only a section label: "Chorus", "Verse 2:", "Bridge x2", "PRE-CHORUS (2x)".
+# Bare lines only count with a canonical name, since a lyric line may well be
+# just "Build" or "Ending"; the short aliases ("V1", "Pre", "C") are accepted
+# inside [...] headers and ChordPro directives.
+_LABEL_LINE_RE = _label_re(SECTION_ALIASES)
+_ALIAS_LABEL_RE = _label_re(a for aliases in SECTION_ALIASES.values() for a in aliases)
+_BRACKET_HEADER_RE = re.compile(r'^\[(.+?)\]\s*$')
+_CHORD_RE = re.compile(r'\[[^\]]*\]')
+_DIRECTIVE_RE = re.compile(r'^\{\s*([A-Za-z_]+)\s*(?::\s*(.*?))?\s*\}$')
+_META_RE = re.compile(r'^(title|artist|author|by|key|tempo|time|ccli|copyright|album)\s*:\s*(.*)$', re.I)
+_FILENAME_SPLIT_RE = re.compile(r'\s+[-–—]\s+')
+_KEY_RE = re.compile(r'[^a-z0-9]+')
+
+# ChordPro short directive names, e.g. {soc} ... {eoc}, {t: Title}, {c: Verse 2}.
+_DIRECTIVE_ALIASES = {
+    't': 'title', 'st': 'subtitle', 'c': 'comment', 'ci': 'comment_italic', 'cb': 'comment_box',
+    'soc': 'start_of_chorus', 'eoc': 'end_of_chorus', 'sov': 'start_of_verse', 'eov': 'end_of_verse',
+    'sob': 'start_of_bridge', 'eob': 'end_of_bridge', 'sot': 'start_of_tab', 'eot': 'end_of_tab',
+    'sog': 'start_of_grid', 'eog': 'end_of_grid',
+}
+_SKIPPED_ENVIRONMENTS = {'tab', 'grid', 'abc', 'ly', 'svg', 'textblock'}
+
+
+def search_key(text: str) -> str:
+    """Accent-, case- and punctuation-insensitive form used for matching titles and artists."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _KEY_RE.sub(' ', text.lower()).strip()
+
+
+def is_library_url(url: str | None) -> bool:
+    return bool(url) and url.startswith(LIBRARY_URL_PREFIX)
+
+
+def _split_query(query: str) -> tuple[str, str]:
+    """'Title – Artist' -> ('Title', 'Artist'); a bare title gets an empty artist."""
+    parts = _FILENAME_SPLIT_RE.split((query or '').strip(), maxsplit=1)
+    return (parts[0], parts[1]) if len(parts) == 2 else (parts[0], '')
+
+
+class _SectionBuilder:
+    """Collects (label, lines) pairs; a header with no lines after it produces no section."""
+
+    def __init__(self):
+        self.sections: list[dict] = []
+        self.label = 'SECTION'
+        self.lines: list[str] = []
+
+    def flush(self):
+        if self.lines:
+            self.sections.append({'label': _normalize_section_label(self.label), 'lines': self.lines})
+        self.lines = []
+
+    def start(self, label: str):
+        self.flush()
+        self.label = label or 'SECTION'
+
+    def add(self, line: str):
+        line = ' '.join(line.split())
+        if line:
+            self.lines.append(line)
+
+
+def parse_plain_text(text: str) -> tuple[dict, list[dict]]:
+    """Parse a plain-text lyric file into (metadata, sections)."""
+    meta = {}
+    builder = _SectionBuilder()
+    in_header = True
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if in_header:
+            m = _META_RE.match(line)
+            if m:
+                meta.setdefault(m.group(1).lower(), m.group(2).strip())
+                continue
+            in_header = False
+        m = _BRACKET_HEADER_RE.match(line)
+        if m:
+            builder.start(m.group(1)); continue
+        if _LABEL_LINE_RE.match(line):
+            builder.start(line.rstrip(':')); continue
+        builder.add(line)
+    builder.flush()
+    return meta, builder.sections
+
+
+def parse_chordpro(text: str) -> tuple[dict, list[dict]]:
+    """Parse a ChordPro lyric file into (metadata, sections); chords are dropped."""
+    meta = {}
+    builder = _SectionBuilder()
+    skipping = False
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        m = _DIRECTIVE_RE.match(line)
+        if m:
+            name, arg = m.group(1).lower(), (m.group(2) or '').strip()
+            name = _DIRECTIVE_ALIASES.get(name, name)
+            if name == 'title':
+                meta.setdefault('title', arg)
+            elif name in ('artist', 'subtitle', 'composer'):
+                # a real {artist} beats a {subtitle} that happened to come first
+                if name == 'artist' or 'artist' not in meta: meta['artist'] = arg
+            elif name in ('album', 'copyright', 'ccli', 'key', 'tempo', 'time'):
+                meta.setdefault(name, arg)
+            elif name.startswith('start_of_'):
+                env = name[len('start_of_'):]
+                skipping = env in _SKIPPED_ENVIRONMENTS
+                if not skipping: builder.start(arg or env)
+            elif name.startswith('end_of_'):
+                if not skipping: builder.flush()
+                skipping = False
+            elif name in ('comment', 'comment_italic', 'comment_box', 'highlight'):
+                if _ALIAS_LABEL_RE.match(arg): builder.start(arg.rstrip(':'))
+            elif name == 'chorus':
+                # {chorus} repeats the most recent chorus
+                builder.flush()
+                chorus = next((s for s in reversed(builder.sections) if s['label'].startswith('CHORUS')), None)
+                if chorus: builder.sections.append({'label': chorus['label'], 'lines': list(chorus['lines'])})
+            continue
+        if skipping:
+            continue
+        m = _BRACKET_HEADER_RE.match(line)
+        # "[C]" alone is a chord; only longer bracketed labels are section headers
+        if m and len(m.group(1).strip()) > 2 and _ALIAS_LABEL_RE.match(m.group(1).strip()):
+            builder.start(m.group(1)); continue
+        if _LABEL_LINE_RE.match(line):
+            builder.start(line.rstrip(':')); continue
+        builder.add(_CHORD_RE.sub('', line))
+    builder.flush()
+    return meta, builder.sections
+
+
+def parse_lyric_file(path: str) -> dict:
+    """Read one lyric file and return {'title', 'artist', 'sections'}."""
+    kind = LIBRARY_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if kind is None:
+        raise ValueError(f'Unsupported lyric file type: {path}')
+    with open(path, encoding='utf-8-sig', errors='replace') as f:
+        text = f.read()
+    meta, sections = (parse_chordpro if kind == 'chordpro' else parse_plain_text)(text)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name_title, name_artist = _split_query(stem)
+    title = meta.get('title') or name_title
+    artist = meta.get('artist') or meta.get('author') or meta.get('by') or name_artist
+    if not sections:
+        raise ValueError(f'No lyrics found in {path}')
+    return {'title': title.strip(), 'artist': artist.strip(), 'sections': sections}
+
+
+def render_lyrics(sections: list[dict], with_headers: bool) -> str:
+    """Lyrics text in the shape Genius returns: optional [LABEL] headers, blank line between sections."""
+    blocks = []
+    for sec in sections:
+        lines = sec['lines']
+        blocks.append('\n'.join(([f"[{sec['label']}]"] if with_headers else []) + lines))
+    return '\n\n'.join(blocks)
+
+
+class LyricsLibrary:
+    """SQLite store of imported lyric files, looked up before Genius.
+
+    Lookups never create the database: until something has been imported
+    (or when ``path`` is empty) every lookup simply misses.
+    """
+
+    def __init__(self, path: str = LYRICS_LIBRARY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self, create: bool = False):
+        if self._conn is None:
+            if not self.path or not (create or os.path.exists(self.path)):
+                return None
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS songs ('
+                ' id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, root TEXT NOT NULL,'
+                ' size INTEGER NOT NULL, mtime REAL NOT NULL,'
+                ' title TEXT NOT NULL, artist TEXT NOT NULL, title_key TEXT NOT NULL, search_key TEXT NOT NULL,'
+                ' sections TEXT NOT NULL, imported_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS songs_title ON songs (title_key)')
+        return self._conn
+
+    # -- ingestion -------------------------------------------------------
+
+    def import_paths(self, paths, prune: bool = True, verbose: bool = False) -> dict:
+        """
+        Import every supported file under ``paths`` (folders are walked recursively).
+
+        Unchanged files (same size and mtime) are skipped; with ``prune`` the
+        songs whose files vanished from an imported folder are deleted.
+        Returns counts of added, updated, unchanged, removed and failed files.
+        """
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+        with self._lock:
+            if self._connect(create=True) is None:
+                return stats
+        for root in paths:
+            root = os.path.abspath(os.path.expanduser(root))
+            with self._lock:
+                known = {row[0]: (row[1], row[2]) for row in self._connect().execute(
+                    'SELECT path, size, mtime FROM songs WHERE root = ?', (root,))}
+            # Walk and parse without the lock, so lookups keep answering during a long import;
+            # the lock is only taken again for the write.
+            files = [root] if os.path.isfile(root) else [
+                os.path.join(d, name) for d, _, names in os.walk(root) for name in sorted(names)
+                if os.path.splitext(name)[1].lower() in LIBRARY_EXTENSIONS]
+            present, rows = set(), []
+            for path in files:
+                try:
+                    st = os.stat(path)
+                    present.add(path)
+                    if known.get(path) == (st.st_size, st.st_mtime):
+                        stats['unchanged'] += 1; continue
+                    song = parse_lyric_file(path)
+                except (OSError, ValueError) as e:
+                    stats['failed'] += 1
+                    if verbose: print(f'  skipped {path}: {e}')
+                    continue
+                rows.append((path, root, st.st_size, st.st_mtime, song['title'], song['artist'], search_key(song['title']),
+                             search_key(f"{song['title']} {song['artist']}"), json.dumps(song['sections']), time.time()))
+                stats['updated' if path in known else 'added'] += 1
+                if verbose: print(f"  {song['title']}{' – ' + song['artist'] if song['artist'] else ''}")
+            # files that vanished (even mid-walk) are dropped along with those no longer there
+            gone = set(known) - present if prune and os.path.isdir(root) else set()
+            with self._lock:
+                conn = self._connect()
+                conn.execute('BEGIN')
+                try:
+                    conn.executemany(
+                        'INSERT INTO songs (path, root, size, mtime, title, artist, title_key, search_key, sections, imported_at)'
+                        ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+                        ' ON CONFLICT(path) DO UPDATE SET root = excluded.root, size = excluded.size, mtime = excluded.mtime,'
+                        ' title = excluded.title, artist = excluded.artist, title_key = excluded.title_key,'
+                        ' search_key = excluded.search_key, sections = excluded.sections, imported_at = excluded.imported_at',
+                        rows)
+                    conn.executemany('DELETE FROM songs WHERE path = ?', [(p,) for p in gone])
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK'); raise
+            stats['removed'] += len(gone)
+        return stats
+
+    # -- lookups ---------------------------------------------------------
+
+    def _rows(self, sql: str, params=()) -> list:
+        try:
+            with self._lock:
+                conn = self._connect()
+                return conn.execute(sql, params).fetchall() if conn is not None else []
+        except sqlite3.Error:
+            return []
+
+    @staticmethod
+    def _song(row) -> dict:
+        return {'id': row[0], 'title': row[1], 'artist': row[2], 'sections': json.loads(row[3])}
+
+    def get(self, song_id: int) -> dict | None:
+        rows = self._rows('SELECT id, title, artist, sections FROM songs WHERE id = ?', (song_id,))
+        return self._song(rows[0]) if rows else None
+
+    def find(self, title: str, artist: str = '') -> dict | None:
+        """Exact (normalised) title match; when both sides name an artist it must match too."""
+        tkey = search_key(title)
+        if not tkey:
+            return None
+        rows = self._rows('SELECT id, title, artist, sections FROM songs WHERE title_key = ? ORDER BY id', (tkey,))
+        akey = search_key(artist)
+        for row in rows:
+            if not akey or not search_key(row[2]) or search_key(row[2]) == akey:
+                return self._song(row)
+        return None
+
+    def lookup_query(self, query: str) -> dict | None:
+        """Resolve a free-text 'Title – Artist' query to one library song, if it names one exactly."""
+        title, artist = _split_query(query)
+        return self.find(title, artist) or (self.find(query) if artist else None)
+
+    def resolve(self, url: str | None, title: str = '', artist: str = '') -> dict | None:
+        """
+        The library song behind a ``library:<id>`` URL or, when there is no URL
+        at all, an exact title/artist match.  Any other URL is a version the
+        user picked elsewhere and is never swapped for a library song.
+        """
+        if is_library_url(url):
+            ident = url[len(LIBRARY_URL_PREFIX):]
+            return self.get(int(ident)) if ident.isdigit() else None
+        return self.find(title, artist) if title and not url else None
+
+    def search(self, query: str, limit: int = 5) -> list[dict]:
+        """Songs whose title/artist contain every word of ``query``, best title matches first."""
+        qkey = search_key(query)
+        if not qkey:
+            return []
+        tokens = qkey.split()
+        where = ' AND '.join('search_key LIKE ?' for _ in tokens)
+        rows = self._rows(
+            f'SELECT id, title, artist FROM songs WHERE {where}'
+            ' ORDER BY (title_key = ?) DESC, (title_key LIKE ?) DESC, length(title_key), id LIMIT ?',
+            [f'%{t}%' for t in tokens] + [qkey, qkey + '%', limit])
+        return [{'id': r[0], 'title': r[1], 'artist': r[2]} for r in rows]
+
+    def suggestions(self, query: str, limit: int = 5) -> list[dict]:
+        """:meth:`search` results shaped like Genius suggestions for the web UI."""
+        return [{'title': s['title'], 'artist': s['artist'], 'url': f"{LIBRARY_URL_PREFIX}{s['id']}",
+                 'thumbnail': None, 'gid': None, 'source': 'library'} for s in self.search(query, limit)]
+
+    def lyrics(self, url: str | None, title: str = '', artist: str = '', with_headers: bool = False) -> str | None:
+        song = self.resolve(url, title, artist)
+        return render_lyrics(song['sections'], with_headers) if song else None
+
+    def all(self) -> list[dict]:
+        return [{'id': r[0], 'title': r[1], 'artist': r[2], 'path': r[3]}
+                for r in self._rows('SELECT id, title, artist, path FROM songs ORDER BY title_key, id')]
+
+
+LYRICS_LIBRARY = LyricsLibrary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the local lyrics library.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help='Import (or re-sync) folders or files of lyric files')
+    imp.add_argument('paths', nargs='+')
+    imp.add_argument('--keep-missing', action='store_true', help='Keep songs whose files were removed')
+    srch = sub.add_parser('search', help='Search the library by title/artist')
+    srch.add_argument('query')
+    sub.add_parser('list', help='List every song in the library')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        stats = LYRICS_LIBRARY.import_paths(args.paths, prune=not args.keep_missing, verbose=True)
+        print(', '.join(f'{v} {k}' for k, v in stats.items()))
+    elif args.command == 'search':
+        for s in LYRICS_LIBRARY.search(args.query, limit=20):
+            print(f"{LIBRARY_URL_PREFIX}{s['id']}  {s['title']}{' – ' + s['artist'] if s['artist'] else ''}")
+    else:
+        for s in LYRICS_LIBRARY.all():
+            print(f"{LIBRARY_URL_PREFIX}{s['id']}  {s['title']}{' – ' + s['artist'] if s['artist'] else ''}  ({s['path']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -32,14 +32,32 @@ the presentation generation logic.
 
 import os
 import re
+import sys
+import time
+import queue
+import random
+import sqlite3
+import functools
 import datetime
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
 from google.auth.transport.requests import Request
 from lyricsgenius import Genius
+from requests.adapters import HTTPAdapter
 import argparse
+
+from lyrics_library import LYRICS_LIBRARY, is_library_url, render_lyrics, search_key
+from pptx_writer import write_pptx
+from worship_scoring import WORSHIP_SCORER
+
 BACKGROUND_IMAGE_URL = os.getenv('BACKGROUND_IMAGE_URL', 'https://images.unsplash.com/photo-1519681393784-d120267933ba')
 
 SCOPES = ['https://www.googleapis.com/auth/presentations']
@@ -60,6 +78,268 @@ BACKGROUND_IMAGE_URL = (
 )
 
 
+# Genius client pool.  Every Genius object owns a requests.Session, so
+# building one per call means a fresh TLS handshake per search.  The pool
+# keeps up to GENIUS_POOL_SIZE long-lived clients per option set and hands
+# them out one caller at a time, which keeps their sessions (and keep-alive
+# connections) warm across calls and threads.
+GENIUS_POOL_SIZE = int(os.getenv('GENIUS_POOL_SIZE', '4'))
+GENIUS_TIMEOUT = float(os.getenv('GENIUS_TIMEOUT', '15'))
+GENIUS_RETRIES = int(os.getenv('GENIUS_RETRIES', '3'))
+# Songs the CLI fetches at once (--jobs); more than GENIUS_POOL_SIZE just queue for a client.
+CLI_FETCH_JOBS = int(os.getenv('CLI_FETCH_JOBS', str(GENIUS_POOL_SIZE)))
+DEFAULT_EXCLUDED_TERMS = ('(Remix)', '(Live)')
+
+
+class GeniusPool:
+    """Thread-safe pool of long-lived ``Genius`` clients.
+
+    Clients are grouped by the keyword options they were built with (e.g.
+    ``remove_section_headers``) and created lazily up to ``size`` per group.
+    Use :meth:`client` as a context manager to borrow one; when every client
+    stays busy for as long as one request may take with all its retries,
+    borrowing gives up with a RuntimeError instead of waiting forever.
+    """
+
+    def __init__(self, size: int = GENIUS_POOL_SIZE, timeout: float = GENIUS_TIMEOUT,
+                 retries: int = GENIUS_RETRIES):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._idle: dict[tuple, queue.LifoQueue] = {}
+        self._created: dict[tuple, int] = {}
+
+    @staticmethod
+    def _key(options: dict) -> tuple:
+        return tuple(sorted(
+            (k, tuple(v) if isinstance(v, (list, tuple)) else v) for k, v in options.items()
+        ))
+
+    def _build(self, options: dict) -> Genius:
+        token = os.getenv('GENIUS_ACCESS_TOKEN')
+        if not token:
+            raise RuntimeError('Please set the GENIUS_ACCESS_TOKEN environment variable.')
+        kwargs = dict(options)
+        if kwargs.get('excluded_terms') is not None:
+            kwargs['excluded_terms'] = list(kwargs['excluded_terms'])
+        genius = Genius(token, timeout=self.timeout, retries=self.retries, **kwargs)
+        # Size the session's connection pool so a borrowed client never has
+        # to discard a kept-alive connection to api.genius.com / genius.com.
+        session = getattr(genius, '_session', None)
+        if session is not None:
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        return genius
+
+    @contextlib.contextmanager
+    def client(self, skip_non_songs: bool = True, excluded_terms=DEFAULT_EXCLUDED_TERMS,
+               remove_section_headers: bool = True):
+        options = {
+            'skip_non_songs': skip_non_songs,
+            'excluded_terms': excluded_terms,
+            'remove_section_headers': remove_section_headers,
+        }
+        key = self._key(options)
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+            create = idle.empty() and self._created.get(key, 0) < self.size
+            if create:
+                self._created[key] = self._created.get(key, 0) + 1
+        if create:
+            try:
+                genius = self._build(options)
+            except Exception:
+                with self._lock:
+                    self._created[key] -= 1
+                raise
+        else:
+            wait = self.timeout * (self.retries + 1)
+            try:
+                genius = idle.get(timeout=wait)
+            except queue.Empty:
+                raise RuntimeError(f'No Genius client became free within {wait:g}s '
+                                   f'(all {self.size} are busy); try again shortly') from None
+        try:
+            yield genius
+        finally:
+            idle.put(genius)
+
+    def warm(self, **options) -> None:
+        """Build one client for ``options`` ahead of the first request."""
+        with self.client(**options):
+            pass
+
+
+GENIUS_POOL = GeniusPool()
+
+
+# Persistent lyrics cache.  Scraped lyrics are stored in a SQLite file next
+# to this script, keyed by Genius song URL (and id when known), so a setlist
+# that repeats week to week is served without scraping Genius again.  The
+# "variant" column separates lyrics fetched with and without section headers.
+LYRICS_CACHE_PATH = os.getenv(
+    'LYRICS_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lyrics_cache.sqlite3')
+)
+LYRICS_CACHE_TTL_DAYS = float(os.getenv('LYRICS_CACHE_TTL_DAYS', '30'))
+LYRICS_CACHE_MAX_MB = float(os.getenv('LYRICS_CACHE_MAX_MB', '64'))
+
+
+class LyricsCache:
+    """SQLite-backed lyrics store with TTL and size-based (LRU) eviction.
+
+    An empty ``path`` disables the cache: :meth:`get` always misses and
+    :meth:`put` is a no-op.
+    """
+
+    def __init__(self, path: str = LYRICS_CACHE_PATH, ttl_days: float = LYRICS_CACHE_TTL_DAYS,
+                 max_mb: float = LYRICS_CACHE_MAX_MB):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS lyrics ('
+                ' url TEXT NOT NULL, variant TEXT NOT NULL, genius_id INTEGER,'
+                ' title TEXT, artist TEXT, lyrics TEXT NOT NULL,'
+                ' size INTEGER NOT NULL, fetched_at REAL NOT NULL, accessed_at REAL NOT NULL,'
+                ' PRIMARY KEY (url, variant))'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS lyrics_gid ON lyrics (genius_id, variant)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS lyrics_lru ON lyrics (accessed_at)')
+            # Which search result was picked for a query, so `--auto` runs repeat it.
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS choices ('
+                ' query TEXT PRIMARY KEY, url TEXT, genius_id INTEGER, title TEXT, artist TEXT, chosen_at REAL NOT NULL)'
+            )
+            # Which song a search_song(title, artist) fallback found, so its cached lyrics can be found again.
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS searches (title TEXT, artist TEXT, url TEXT NOT NULL, PRIMARY KEY (title, artist))'
+            )
+        return self._conn
+
+    def get_choice(self, song_query: str) -> dict | None:
+        """The candidate last chosen for ``song_query`` (matched case/punctuation-insensitively)."""
+        if not self.path:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute('SELECT url, genius_id, title, artist FROM choices WHERE query = ?',
+                                              (search_key(song_query),)).fetchone()
+        except sqlite3.Error:
+            return None
+        return {'url': row[0], 'id': row[1], 'title': row[2], 'artist': row[3]} if row else None
+
+    def put_choice(self, song_query: str, chosen: dict) -> None:
+        if not self.path or not chosen.get('url'):
+            return
+        try:
+            with self._lock:
+                self._connect().execute('INSERT OR REPLACE INTO choices VALUES (?, ?, ?, ?, ?, ?)',
+                                        (search_key(song_query), chosen['url'], chosen.get('id'), chosen.get('title', ''),
+                                         chosen.get('artist', ''), time.time()))
+        except sqlite3.Error:
+            pass
+
+    def get_search(self, title: str, artist: str) -> str | None:
+        """URL of the song a search for ``title``/``artist`` found before (matched like :meth:`get_choice`)."""
+        if not self.path:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute('SELECT url FROM searches WHERE title = ? AND artist = ?',
+                                              (search_key(title), search_key(artist))).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def put_search(self, title: str, artist: str, url: str | None) -> None:
+        if not self.path or not url:
+            return
+        try:
+            with self._lock:
+                self._connect().execute('INSERT OR REPLACE INTO searches VALUES (?, ?, ?)',
+                                        (search_key(title), search_key(artist), url))
+        except sqlite3.Error:
+            pass
+
+    def get(self, url: str | None = None, genius_id: int | None = None, variant: str = 'plain') -> str | None:
+        if not self.path or not (url or genius_id):
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                if url:
+                    row = conn.execute('SELECT url, lyrics, fetched_at FROM lyrics WHERE url = ? AND variant = ?',
+                                       (url, variant)).fetchone()
+                else:
+                    row = conn.execute('SELECT url, lyrics, fetched_at FROM lyrics WHERE genius_id = ? AND variant = ?',
+                                       (int(genius_id), variant)).fetchone()
+                if row is None:
+                    return None
+                key, lyrics, fetched_at = row
+                if self.ttl and now - fetched_at > self.ttl:
+                    conn.execute('DELETE FROM lyrics WHERE url = ? AND variant = ?', (key, variant))
+                    return None
+                conn.execute('UPDATE lyrics SET accessed_at = ? WHERE url = ? AND variant = ?', (now, key, variant))
+                return lyrics
+        except sqlite3.Error:
+            return None
+
+    def put(self, lyrics: str, url: str | None, genius_id: int | None = None, variant: str = 'plain',
+            title: str = '', artist: str = '') -> None:
+        if not self.path or not url or not lyrics:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    'INSERT OR REPLACE INTO lyrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (url, variant, int(genius_id) if genius_id else None, title, artist, lyrics,
+                     len(lyrics.encode('utf-8')), now, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error:
+            pass
+
+    def songs(self) -> list[dict]:
+        """Title, artist, URL and Genius id of every cached song."""
+        if not self.path or not os.path.exists(self.path):
+            return []
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT url, MAX(genius_id), MAX(title), MAX(artist) FROM lyrics WHERE title != '' GROUP BY url").fetchall()
+        except sqlite3.Error:
+            return []
+        return [{'url': url, 'gid': gid, 'title': title, 'artist': artist or ''} for url, gid, title, artist in rows]
+
+    def _evict(self, conn, now: float) -> None:
+        if self.ttl:
+            conn.execute('DELETE FROM lyrics WHERE fetched_at < ?', (now - self.ttl,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM lyrics').fetchone()[0]
+        if self.max_bytes and total > self.max_bytes:
+            # Drop least recently used rows until we are back under budget.
+            for key, variant, size in conn.execute(
+                    'SELECT url, variant, size FROM lyrics ORDER BY accessed_at').fetchall():
+                conn.execute('DELETE FROM lyrics WHERE url = ? AND variant = ?', (key, variant))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+LYRICS_CACHE = LyricsCache()
+
+
 def split_title_artist(song_query: str) -> tuple[str, str]:
     """
     Split on either en-dash (–) or hyphen (-), first occurrence.
@@ -71,7 +351,17 @@ def split_title_artist(song_query: str) -> tuple[str, str]:
     return title, artist
 
 
-def fetch_lyrics_from_genius(song_query: str) -> str:
+def read_setlist(path: str) -> list[str]:
+    """Song queries from a setlist file: one per line, blank lines skipped."""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# Interactive prompts from concurrent fetches (--jobs) must not interleave.
+_PROMPT_LOCK = threading.Lock()
+
+
+def fetch_lyrics_from_genius(song_query: str, auto: bool = False) -> str:
     """
     Search for a song on Genius and return its lyrics.
 
@@ -84,6 +374,8 @@ def fetch_lyrics_from_genius(song_query: str) -> str:
 
     Args:
         song_query: The user supplied query string (e.g. "Oceans – Hillsong UNITED").
+        auto: Never prompt.  Reuse the candidate chosen for this query last
+            time if there is one, otherwise take the top worship score.
 
     Returns:
         A single string containing the full lyrics for the chosen song.
@@ -92,32 +384,30 @@ def fetch_lyrics_from_genius(song_query: str) -> str:
         RuntimeError: If the Genius API token is not available.
         ValueError: If no lyrics can be retrieved after searching.
     """
-    # Fetch the API token either from the environment or fall back to the
-    # baked‑in token used previously.  Raising a RuntimeError here clarifies
-    # to the caller that authentication is required for any network calls.
-    token = os.getenv('GENIUS_ACCESS_TOKEN')
-    if not token:
-        raise RuntimeError('Please set the GENIUS_ACCESS_TOKEN environment variable.')
-    # Instantiate the Genius API client with sensible defaults.  We continue
-    # to skip non‑songs and remove section headers to keep the slides clean.
-    genius = Genius(
-        token,
-        skip_non_songs=True,
-        excluded_terms=['(Remix)', '(Live)'],
-        remove_section_headers=True,
-        timeout=15,
-        retries=3
-    )
-    # Define a set of keywords commonly found in worship music.  These
-    # keywords are used to rank search results to make worship songs more
-    # likely to be selected automatically.  Feel free to expand this list
-    # if you find certain artists or themes that are representative of the
-    # music you wish to prioritise.
-    WORSHIP_KEYWORDS = [
-        'worship', 'praise', 'christ', 'jesus', 'god', 'hillsong', 'bethel',
-        'church', 'faith', 'grace', 'redeemer', 'lord', 'holy', 'gospel',
-        'alive', 'blessing', 'spirit', 'hope', 'saved'
-    ]
+    # Songs in the local library (see lyrics_library.py) are used as-is when
+    # the query names one exactly, so no Genius token is needed for them.
+    local = LYRICS_LIBRARY.lookup_query(song_query)
+    if local:
+        print(f"Using “{local['title']}” from the local lyrics library.")
+        return render_lyrics(local['sections'], with_headers=False)
+    # Borrow a pooled Genius client.  The pool raises a RuntimeError when
+    # the API token is missing, and its defaults skip non‑songs and remove
+    # section headers to keep the slides clean.
+    with GENIUS_POOL.client() as genius:
+        return _fetch_lyrics_from_genius(genius, song_query, auto)
+
+
+def _fetch_lyrics_from_genius(genius: Genius, song_query: str, auto: bool = False) -> str:
+    # In auto mode a query we have answered before goes straight to the song
+    # chosen then (usually from the lyrics cache), with no search at all.
+    if auto:
+        previous = LYRICS_CACHE.get_choice(song_query)
+        if previous:
+            lyrics = fetch_song_lyrics(previous['title'], previous['artist'], previous['url'],
+                                       genius_id=previous['id'], genius=genius)
+            if lyrics:
+                print(f'“{song_query}”: using previous choice {previous["title"]} – {previous["artist"]}')
+                return lyrics
     # Attempt to find songs matching the query.  We request multiple
     # results so that we can rank and optionally present alternatives.  The
     # search_songs API returns a dictionary containing a list of hits.  If
@@ -134,6 +424,8 @@ def fetch_lyrics_from_genius(song_query: str) -> str:
         print(f'Searching for “{song_query}”…')
         song = genius.search_song(song_query)
         if song and song.lyrics:
+            LYRICS_CACHE.put(song.lyrics, getattr(song, 'url', None), getattr(song, 'id', None),
+                             title=song.title, artist=getattr(song, 'artist', ''))
             return song.lyrics
         # No matches at all – present a message and abort.
         raise ValueError(f'No lyrics found on Genius for “{song_query}”. Please check the spelling or try another song.')
@@ -141,17 +433,18 @@ def fetch_lyrics_from_genius(song_query: str) -> str:
     # stores the title, artist, url and score so that we can later fetch
     # lyrics directly from the result's URL.
     candidates_raw = []
-    for hit in hits:
+    # Score every hit in one pass with the shared worship scorer (see
+    # worship_scoring.py): each worship keyword found in the title or artist
+    # adds its weight, so worship songs float to the top.  Keywords and
+    # per-artist weights can be tuned in .env.
+    scores = WORSHIP_SCORER.score_hits(hits)
+    for hit, score in zip(hits, scores):
         result = hit.get('result', {})
         title = result.get('title', '')
         artist_name = result.get('primary_artist', {}).get('name', '')
         url = result.get('url', None)
-        # Compute a simple heuristic score based on the presence of worship
-        # keywords in the title or artist.  The more keywords present, the
-        # higher the score.  The scoring is case‑insensitive.
-        combined = f'{title} {artist_name}'.lower()
-        score = sum(1 for kw in WORSHIP_KEYWORDS if kw in combined)
-        candidates_raw.append({'title': title, 'artist': artist_name, 'url': url, 'score': score})
+        candidates_raw.append({'title': title, 'artist': artist_name, 'url': url, 'id': result.get('id'),
+                               'score': score})
     # Sort candidates by score descending; maintain original order for ties
     # by using enumerate as a secondary key.  Without this stable sort,
     # items with equal scores might shuffle unpredictably.
@@ -167,48 +460,95 @@ def fetch_lyrics_from_genius(song_query: str) -> str:
     # because none of the titles appear to be worship songs.  Otherwise,
     # we still prompt but make it clear that pressing Enter will pick
     # the highest scoring option by default.
-    print(f'\nPossible matches for “{song_query}”:\n')
-    for idx, cand in enumerate(sorted_candidates, start=1):
-        print(f'  {idx}. {cand["title"]} – {cand["artist"]}  (score: {cand["score"]})')
-    prompt = 'Select the correct song by entering its number' + (
-        ' (press Enter to pick the top result): ' if sorted_candidates[0]['score'] > 0 else ' (press Enter to pick the first result): '
-    )
-    choice = input(prompt).strip()
+    # In auto mode there is nobody to ask: take the top candidate, exactly
+    # what pressing Enter at the prompt would pick.
     selection_index = 0
-    if choice:
-        try:
-            entered = int(choice)
-            if 1 <= entered <= len(sorted_candidates):
-                selection_index = entered - 1
-        except ValueError:
-            # If the user input isn't a number, ignore it and use the default
-            pass
+    if auto:
+        top = sorted_candidates[0]
+        print(f'“{song_query}”: auto-selected {top["title"]} – {top["artist"]}  (score: {top["score"]})')
+    else:
+        # Hold the prompt lock so concurrent fetches ask one question at a time.
+        with _PROMPT_LOCK:
+            print(f'\nPossible matches for “{song_query}”:\n')
+            for idx, cand in enumerate(sorted_candidates, start=1):
+                print(f'  {idx}. {cand["title"]} – {cand["artist"]}  (score: {cand["score"]})')
+            prompt = 'Select the correct song by entering its number' + (
+                ' (press Enter to pick the top result): ' if sorted_candidates[0]['score'] > 0 else ' (press Enter to pick the first result): '
+            )
+            choice = input(prompt).strip()
+        if choice:
+            try:
+                entered = int(choice)
+                if 1 <= entered <= len(sorted_candidates):
+                    selection_index = entered - 1
+            except ValueError:
+                # If the user input isn't a number, ignore it and use the default
+                pass
     chosen = sorted_candidates[selection_index]
-    # Fetch lyrics using the chosen candidate's URL.  Using the URL
-    # directly avoids relying on Genius.search_song to find the exact
-    # version we selected from the search results.  If this fails, we
-    # fallback to search_song with the explicit title and artist.
+    # Remember the pick (made by a person or by auto) for later --auto runs.
+    LYRICS_CACHE.put_choice(song_query, chosen)
+    # Fetch lyrics using the chosen candidate's URL (served from the local
+    # lyrics cache when we have scraped it before).  Using the URL directly
+    # avoids relying on Genius.search_song to find the exact version we
+    # selected from the search results.
+    lyrics = fetch_song_lyrics(chosen['title'], chosen['artist'], chosen.get('url'),
+                               genius_id=chosen.get('id'), genius=genius)
+    if not lyrics:
+        raise ValueError(f'Could not retrieve lyrics for {chosen["title"]} by {chosen["artist"]}')
+    return lyrics
+
+
+def fetch_song_lyrics(title: str, artist: str, url: str | None, genius_id: int | None = None,
+                      remove_section_headers: bool = True, genius: Genius | None = None) -> str | None:
+    """
+    Return lyrics for a song we have already identified, or ``None``.
+
+    The local :data:`LYRICS_LIBRARY` answers first, for ``library:<id>``
+    URLs and, when there is no URL, for exact title/artist matches, without
+    touching the network.  Next comes the persistent :data:`LYRICS_CACHE`;
+    without a URL or id it is keyed by the song a previous ``search_song``
+    fallback found for this title and artist.  On a miss the lyrics are
+    scraped from ``url`` and, failing that, looked up with
+    ``search_song(title, artist)``; whatever is found is written back to the
+    cache.  ``genius`` is borrowed from :data:`GENIUS_POOL` when not given.
+    """
+    local = LYRICS_LIBRARY.lyrics(url, title, artist, with_headers=not remove_section_headers)
+    if local:
+        return local
+    if is_library_url(url):
+        # the library song has gone since it was suggested; fall back to a search
+        url = None
+    if not (url or genius_id):
+        url = LYRICS_CACHE.get_search(title, artist)
+    variant = 'plain' if remove_section_headers else 'headers'
+    cached = LYRICS_CACHE.get(url=url, genius_id=genius_id, variant=variant)
+    if cached:
+        return cached
+    if genius is None:
+        with GENIUS_POOL.client(remove_section_headers=remove_section_headers) as pooled:
+            return fetch_song_lyrics(title, artist, url, genius_id, remove_section_headers, pooled)
     lyrics = None
-    if chosen.get('url'):
+    if url:
         try:
-            lyrics = genius.lyrics(song_url=chosen['url'])
+            lyrics = genius.lyrics(song_url=url)
         except Exception:
             lyrics = None
-    if not lyrics:
-        # As a fallback, call search_song with the title and artist to
-        # retrieve a Song object, then extract its lyrics.  This is
-        # slower but ensures we return something if the direct URL scrape
-        # fails.
+    if lyrics:
+        LYRICS_CACHE.put(lyrics, url, genius_id, variant, title, artist)
+        return lyrics
+    # As a fallback, call search_song with the title and artist to retrieve
+    # a Song object, then extract its lyrics.  This is slower but ensures we
+    # return something if the direct URL scrape fails.
+    try:
+        song_obj = genius.search_song(title, artist)
+    except Exception:
         song_obj = None
-        try:
-            song_obj = genius.search_song(chosen['title'], chosen['artist'])
-        except Exception:
-            song_obj = None
-        if song_obj and song_obj.lyrics:
-            lyrics = song_obj.lyrics
-    if not lyrics:
-        raise ValueError(f'Could not retrieve lyrics for {chosen["title"]} by {chosen["artist"]}')
-    return lyrics
+    if song_obj and song_obj.lyrics:
+        LYRICS_CACHE.put_search(title, artist, getattr(song_obj, 'url', None))
+        LYRICS_CACHE.put(song_obj.lyrics, getattr(song_obj, 'url', None), getattr(song_obj, 'id', None),
+                         variant, song_obj.title, getattr(song_obj, 'artist', artist))
+        return song_obj.lyrics
+    return None
 
 
 def format_lyrics(lyrics: str):
@@ -227,154 +567,522 @@ def format_lyrics(lyrics: str):
     return [cleaned[i:i + 2] for i in range(0, len(cleaned), 2)]
 
 
-def authenticate():
-    creds = None
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open('token.json', 'w') as token_file:
+SLIDES_REFRESH_MARGIN = float(os.getenv('SLIDES_REFRESH_MARGIN', '300'))
+
+
+class SlidesServiceProvider:
+    """
+    Process-wide Google Slides service.
+
+    The service (and its discovery document) is built once.  Every thread
+    gets its own authorised ``httplib2.Http`` through ``requestBuilder``, as
+    httplib2 connections must not be shared between threads, and a daemon
+    thread refreshes the OAuth token ``SLIDES_REFRESH_MARGIN`` seconds before
+    it expires so requests never wait on a token exchange.
+    """
+
+    def __init__(self, token_path: str = 'token.json', secrets_path: str = 'credentials.json'):
+        self.token_path = token_path
+        self.secrets_path = secrets_path
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._creds = None
+        self._service = None
+        self._refresher = None
+
+    def _load_credentials(self, interactive: bool = True):
+        creds = None
+        if os.path.exists(self.token_path):
+            creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            elif not interactive:
+                raise RuntimeError('Google sign-in needed; it will be requested on the first deck')
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(self.secrets_path, SCOPES)
+                creds = flow.run_local_server(port=0)
+            self._save(creds)
+        return creds
+
+    def _save(self, creds) -> None:
+        with open(self.token_path, 'w') as token_file:
             token_file.write(creds.to_json())
-    return build('slides', 'v1', credentials=creds)
+
+    def _build_request(self, _http, *args, **kwargs):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self._creds, http=httplib2.Http(timeout=60))
+        return HttpRequest(http, *args, **kwargs)
+
+    def service(self, interactive: bool = True):
+        """
+        The shared service.  With ``interactive`` False (background warm-up)
+        a missing or unusable token raises instead of opening the browser
+        sign-in flow, which only an on-demand caller may start.
+        """
+        with self._lock:
+            if self._service is None:
+                self._creds = self._load_credentials(interactive)
+                self._service = build('slides', 'v1', credentials=self._creds,
+                                      requestBuilder=self._build_request, cache_discovery=False)
+                if self._creds.refresh_token and self._refresher is None:
+                    self._refresher = threading.Thread(target=self._refresh_loop, name='slides-token-refresh',
+                                                       daemon=True)
+                    self._refresher.start()
+            return self._service
+
+    @staticmethod
+    def _seconds_left(expiry) -> float:
+        # google-auth keeps expiry as naive UTC
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return (expiry - now).total_seconds() if expiry else 3600
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(max(30.0, self._seconds_left(self._creds.expiry) - SLIDES_REFRESH_MARGIN))
+            try:
+                with self._lock:
+                    if not self._creds.expiry or self._seconds_left(self._creds.expiry) <= SLIDES_REFRESH_MARGIN:
+                        self._creds.refresh(Request())
+                        self._save(self._creds)
+            except Exception as e:
+                # requests still refresh an expired token themselves
+                print(f"⚠️  Background token refresh failed, leaving it to the next request: {e}")
+                with self._lock:
+                    self._refresher = None
+                return
+
+
+SLIDES_SERVICE = SlidesServiceProvider()
+
+
+def authenticate(interactive: bool = True):
+    return SLIDES_SERVICE.service(interactive)
+
+
+SLIDES_CHUNK_REQUESTS = int(os.getenv('SLIDES_CHUNK_REQUESTS', '1000'))
+SLIDES_MAX_RETRIES = int(os.getenv('SLIDES_MAX_RETRIES', '5'))
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+# Errors after which the server may still have applied the request (the
+# gateway gave up, not the backend), unlike 429/503 which reject it outright.
+AMBIGUOUS_STATUSES = {500, 502, 504}
+
+
+def _chunk_object_ids(requests: list[dict]) -> tuple[set[str], set[str]]:
+    """Object IDs a batch of Slides requests creates, and those it deletes."""
+    created, deleted = set(), set()
+    for req in requests:
+        for kind, body in req.items():
+            if kind.startswith('create') and body.get('objectId'):
+                created.add(body['objectId'])
+            elif kind == 'duplicateObject':
+                created.update((body.get('objectIds') or {}).values())
+            elif kind == 'deleteObject':
+                deleted.add(body['objectId'])
+    return created, deleted
+
+
+def _replay_already_applied(e: HttpError, requests: list[dict]) -> bool:
+    """
+    True when a 400 for a replayed batch only says that it already ran: an
+    object it creates exists already, or an object it deletes is gone.
+    """
+    if getattr(e.resp, 'status', None) != 400:
+        return False
+    content = getattr(e, 'content', b'') or b''
+    text = f"{e} {content.decode('utf-8', 'replace') if isinstance(content, bytes) else content}".lower()
+    created, deleted = _chunk_object_ids(requests)
+    if 'should be unique' in text or 'already exists' in text:
+        ids = created
+    elif 'could not be found' in text or 'not found' in text:
+        ids = deleted
+    else:
+        return False
+    return any(object_id.lower() in text for object_id in ids)
+
+
+def _execute_with_backoff(request, retries: int = SLIDES_MAX_RETRIES, requests: list[dict] | None = None):
+    """
+    Execute a googleapiclient request, retrying 429 and 5xx responses with
+    exponential backoff and jitter.  Returns ``(response, retries_used)``.
+
+    A batchUpdate is atomic, so when ``requests`` (its sub-requests) is given
+    and a replay after a 500/502/504 is refused because an object it creates
+    already exists or an object it deletes is already gone, the earlier
+    attempt did land: that is treated as success and the response is None.
+    """
+    ambiguous = False
+    for attempt in range(retries + 1):
+        try:
+            return request.execute(), attempt
+        except HttpError as e:
+            status = getattr(e.resp, 'status', None)
+            if ambiguous and requests and _replay_already_applied(e, requests):
+                return None, attempt
+            if attempt == retries or status not in RETRYABLE_STATUSES:
+                raise
+            ambiguous = ambiguous or status in AMBIGUOUS_STATUSES
+            time.sleep(min(32, 2 ** attempt) * (0.5 + random.random() / 2))
+
+
+def submit_batch_updates(service, pres_id: str, groups, max_requests: int = SLIDES_CHUNK_REQUESTS,
+                         on_chunk=None, sizes: list[int] | None = None) -> list[dict]:
+    """
+    Send ``groups`` of Slides requests as one or more batchUpdate calls.
+
+    Groups (the deck prefix, then one per song) are packed greedily into
+    chunks of at most ``max_requests`` sub-requests and are never split; a
+    group larger than the limit goes out on its own.  ``max_requests <= 0``
+    sends everything in a single call.  When ``sizes`` (the request count of
+    each group) is given, ``groups`` may be a lazy iterable and each group is
+    only built when its chunk is sent.  Each chunk is retried independently
+    on quota and server errors.  Returns per-chunk stats
+    ``{'chunk', 'requests', 'seconds', 'retries'}``, each of which is also
+    passed to ``on_chunk(stats, total_chunks)`` as soon as its chunk lands.
+    """
+    if sizes is None:
+        groups = [list(group) for group in groups]
+        sizes = [len(group) for group in groups]
+    # Plan chunk boundaries up front: [groups in chunk, requests in chunk].
+    plan: list[list[int]] = []
+    for size in sizes:
+        if plan and (max_requests <= 0 or size == 0 or plan[-1][1] + size <= max_requests):
+            plan[-1][0] += 1
+            plan[-1][1] += size
+        else:
+            plan.append([1, size])
+    groups = iter(groups)
+    stats = []
+    for idx, (group_count, _) in enumerate(plan, start=1):
+        chunk: list[dict] = []
+        for _ in range(group_count):
+            chunk.extend(next(groups))
+        start = time.perf_counter()
+        _, retries = _execute_with_backoff(
+            service.presentations().batchUpdate(presentationId=pres_id, body={'requests': chunk}), requests=chunk
+        )
+        stats.append({'chunk': idx, 'requests': len(chunk), 'seconds': time.perf_counter() - start,
+                      'retries': retries})
+        print(f"  batchUpdate {idx}/{len(plan)}: {len(chunk)} requests in {stats[-1]['seconds']:.2f}s"
+              + (f" ({retries} retries)" if retries else ''))
+        if on_chunk:
+            on_chunk(stats[-1], len(plan))
+    return stats
+
+
+# ── Slide request engine ──
+# Every lyric and title slide is described by the same handful of style
+# fragments.  They are built once here and shared by reference between
+# requests (they are only ever serialised, never mutated), so a deck costs
+# one small dict per request instead of a freshly nested tree.
+_WHITE = {'rgbColor': {'red': 1, 'green': 1, 'blue': 1}}
+_ALL_TEXT = {'type': 'ALL'}
+_BLANK_LAYOUT = {'predefinedLayout': 'BLANK'}
+_BACKGROUND_FIELDS = 'pageBackgroundFill.stretchedPictureFill.contentUrl'
+_BAR_PROPERTIES = {
+    'shapeBackgroundFill': {'solidFill': {'color': _WHITE, 'alpha': BOX_ALPHA}},
+    'outline': {'propertyState': 'NOT_RENDERED'}
+}
+_BAR_FIELDS = 'shapeBackgroundFill.solidFill.color,shapeBackgroundFill.solidFill.alpha,outline.propertyState'
+_TEXT_BOX_PROPERTIES = {
+    'shapeBackgroundFill': {'solidFill': {'alpha': 0}},
+    'outline': {'propertyState': 'NOT_RENDERED'},
+    'contentAlignment': 'MIDDLE'
+}
+_TEXT_BOX_FIELDS = 'shapeBackgroundFill.solidFill.alpha,outline.propertyState,contentAlignment'
+_LYRIC_TEXT_STYLE = {
+    'fontFamily': 'Calibri',
+    'fontSize': {'magnitude': FONT_SIZE, 'unit': 'PT'},
+    'foregroundColor': {'opaqueColor': _WHITE},
+    'bold': False
+}
+_LYRIC_TEXT_FIELDS = 'fontFamily,fontSize,foregroundColor,bold'
+_LYRIC_PARAGRAPH_STYLE = {'alignment': 'CENTER', 'lineSpacing': 100}
+
+
+@functools.lru_cache(maxsize=None)
+def _background_properties(url: str) -> dict:
+    return {'pageBackgroundFill': {'stretchedPictureFill': {'contentUrl': url}}}
+
+
+@functools.lru_cache(maxsize=None)
+def _line_geometry(count: int) -> tuple:
+    """(bar size, bar transform, text size, text transform) for each of ``count`` stacked lines."""
+    bar_width = SLIDE_WIDTH * BOX_WIDTH_RATIO
+    x_off = (SLIDE_WIDTH - bar_width) / 2
+    total_h = count * BOX_HEIGHT + (count - 1) * BOX_SPACING
+    y_off = (SLIDE_HEIGHT - total_h) / 2
+    bar_size = {
+        'width': {'magnitude': bar_width, 'unit': 'PT'},
+        'height': {'magnitude': BOX_HEIGHT, 'unit': 'PT'}
+    }
+    txt_size = {
+        'width': {'magnitude': bar_width - 2 * TEXT_INSET, 'unit': 'PT'},
+        'height': {'magnitude': BOX_HEIGHT - 2 * TEXT_INSET, 'unit': 'PT'}
+    }
+    rows = []
+    for j in range(count):
+        y = y_off + j * (BOX_HEIGHT + BOX_SPACING)
+        rows.append((
+            bar_size,
+            {'scaleX': 1, 'scaleY': 1, 'translateX': x_off, 'translateY': y, 'unit': 'PT'},
+            txt_size,
+            {'scaleX': 1, 'scaleY': 1, 'translateX': x_off + TEXT_INSET, 'translateY': y + TEXT_INSET, 'unit': 'PT'},
+        ))
+    return tuple(rows)
+
+
+# Background handling.  In 'slide' mode every slide carries its own
+# stretchedPictureFill; in 'master' mode the deck background is set once on
+# the master and the BLANK layout and slides inherit it, so only songs with
+# a background override pay for per-slide updatePageProperties.
+SLIDES_BACKGROUND_MODE = os.getenv('SLIDES_BACKGROUND_MODE', 'slide')
+_DECK_BACKGROUND = object()
+
+
+def _background_request(obj_id: str, url=_DECK_BACKGROUND) -> dict:
+    return {'updatePageProperties': {
+        'objectId': obj_id,
+        'pageProperties': _background_properties(BACKGROUND_IMAGE_URL if url is _DECK_BACKGROUND else url),
+        'fields': _BACKGROUND_FIELDS
+    }}
+
+
+def resolve_backgrounds(songs_slides: list[tuple[str, list[list[str]]]], song_backgrounds: list[str | None] | None = None,
+                        inherit: bool = False) -> list[str | None]:
+    """
+    Background URL for the deck title (index 0) and each song (1..n).
+    ``None`` means the slide sets no background and inherits the master's.
+    ``song_backgrounds`` holds optional per-song overrides.
+    """
+    deck = None if inherit else BACKGROUND_IMAGE_URL
+    overrides = list(song_backgrounds or [])
+    overrides += [None] * (len(songs_slides) - len(overrides))
+    return [deck] + [override or deck for override in overrides[:len(songs_slides)]]
+
+
+def _inherited_background_requests(page_ids: list[str]) -> list[dict]:
+    return [_background_request(page_id) for page_id in page_ids]
+
+
+def iter_lyric_slide_requests(base_id: str, lines: list[str], background=_DECK_BACKGROUND):
+    """
+    Yield the requests for one lyric slide: blank page, background, then a
+    bar and text box per line.  ``background=None`` leaves the page background
+    to the master/layout.
+    """
+    yield {'createSlide': {'objectId': base_id, 'slideLayoutReference': _BLANK_LAYOUT}}
+    if background is not None:
+        yield _background_request(base_id, background)
+    for j, (line, (bar_size, bar_tf, txt_size, txt_tf)) in enumerate(zip(lines, _line_geometry(len(lines)))):
+        bar_id = f'{base_id}_bar{j}'
+        txt_id = f'{base_id}_txt{j}'
+        yield {'createShape': {
+            'objectId': bar_id,
+            'shapeType': 'RECTANGLE',
+            'elementProperties': {'pageObjectId': base_id, 'size': bar_size, 'transform': bar_tf}
+        }}
+        yield {'updateShapeProperties': {'objectId': bar_id, 'shapeProperties': _BAR_PROPERTIES, 'fields': _BAR_FIELDS}}
+        yield {'createShape': {
+            'objectId': txt_id,
+            'shapeType': 'TEXT_BOX',
+            'elementProperties': {'pageObjectId': base_id, 'size': txt_size, 'transform': txt_tf}
+        }}
+        yield {'updateShapeProperties': {
+            'objectId': txt_id, 'shapeProperties': _TEXT_BOX_PROPERTIES, 'fields': _TEXT_BOX_FIELDS
+        }}
+        yield {'insertText': {'objectId': txt_id, 'insertionIndex': 0, 'text': line}}
+        yield {'updateTextStyle': {
+            'objectId': txt_id, 'style': _LYRIC_TEXT_STYLE, 'textRange': _ALL_TEXT, 'fields': _LYRIC_TEXT_FIELDS
+        }}
+        yield {'updateParagraphStyle': {
+            'objectId': txt_id, 'style': _LYRIC_PARAGRAPH_STYLE, 'textRange': _ALL_TEXT,
+            'fields': 'alignment,lineSpacing'
+        }}
+
+
+def iter_song_requests(sidx: int, song_query: str, slides_content: list[list[str]], background=_DECK_BACKGROUND):
+    """Yield a song's title slide followed by its lyric slides."""
+    song_title, _ = split_title_artist(song_query)
+    yield from _make_title_slide(f'song_title_{sidx}', song_title, background)
+    for idx, lines in enumerate(slides_content):
+        yield from iter_lyric_slide_requests(f'song{sidx}_slide{idx}', lines, background)
+
+
+def song_request_count(slides_content: list[list[str]], background: bool = True) -> int:
+    return 5 + background + sum(1 + background + 7 * len(lines) for lines in slides_content)
+
+
+def deck_request_groups(setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]],
+                        default_slide_id: str | None = None, backgrounds: list[str | None] | None = None,
+                        inherited_pages: list[str] = ()):
+    """
+    Lazily yield the deck's requests as one list per song, preceded by the
+    deck prefix (delete the default slide, deck-wide background on
+    ``inherited_pages``, deck title slide).  Only one song's requests exist
+    at a time.  ``backgrounds`` comes from :func:`resolve_backgrounds`.
+    """
+    backgrounds = backgrounds or resolve_backgrounds(songs_slides)
+    prefix = [{'deleteObject': {'objectId': default_slide_id}}] if default_slide_id else []
+    prefix += _inherited_background_requests(inherited_pages)
+    yield prefix + _make_title_slide('deck_title', setlist_title, backgrounds[0])
+    for sidx, (song_query, slides_content) in enumerate(songs_slides, start=1):
+        yield list(iter_song_requests(sidx, song_query, slides_content, backgrounds[sidx]))
 
 
-def create_setlist_presentation(service, setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]]):
+def deck_group_sizes(songs_slides: list[tuple[str, list[list[str]]]], default_slide_id: str | None = None,
+                     backgrounds: list[str | None] | None = None, inherited_pages: list[str] = ()) -> list[int]:
+    """Request count of each group :func:`deck_request_groups` will yield, without building them."""
+    backgrounds = backgrounds or resolve_backgrounds(songs_slides)
+    prefix = (1 if default_slide_id else 0) + len(inherited_pages) + 5 + (backgrounds[0] is not None)
+    return [prefix] + [song_request_count(slides, bg is not None)
+                       for (_, slides), bg in zip(songs_slides, backgrounds[1:])]
+
+
+def iter_deck_requests(setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]],
+                       default_slide_id: str | None = None, backgrounds: list[str | None] | None = None,
+                       inherited_pages: list[str] = ()):
+    """Flat, lazy stream of every request in the deck."""
+    for group in deck_request_groups(setlist_title, songs_slides, default_slide_id, backgrounds, inherited_pages):
+        yield from group
+
+
+# ── Template mode ──
+# Instead of building every slide from scratch (~16 requests for a two-line
+# slide), build one fully styled prototype per layout, then stamp out each
+# slide with duplicateObject plus one replaceAllText per line.  Duplicates
+# land right after their prototype, so a single updateSlidesPosition puts
+# the deck in order at the end, after which the prototypes are deleted.
+# Prototypes carry the deck background (unless it is inherited), so only
+# songs with an override add an updatePageProperties per slide.
+SLIDES_BUILD_MODE = os.getenv('SLIDES_BUILD_MODE', 'direct')
+_TITLE_PROTO = 'proto_title'
+_TITLE_PLACEHOLDER = '{{TITLE}}'
+
+
+def _line_placeholder(j: int) -> str:
+    return f'{{{{LINE{j}}}}}'
+
+
+def _layout_counts(songs_slides: list[tuple[str, list[list[str]]]]) -> list[int]:
+    return sorted({len(lines) for _, slides_content in songs_slides for lines in slides_content})
+
+
+def _duplicate_title(obj_id: str, text: str) -> list[dict]:
+    return [
+        {'duplicateObject': {'objectId': _TITLE_PROTO,
+                             'objectIds': {_TITLE_PROTO: obj_id, f'{_TITLE_PROTO}_box': f'{obj_id}_box'}}},
+        {'replaceAllText': {'containsText': {'text': _TITLE_PLACEHOLDER, 'matchCase': True},
+                            'replaceText': text.upper(), 'pageObjectIds': [obj_id]}},
+    ]
+
+
+def _duplicate_lyric_slide(base_id: str, lines: list[str]) -> list[dict]:
+    proto = f'proto_l{len(lines)}'
+    ids = {proto: base_id}
+    for j in range(len(lines)):
+        ids[f'{proto}_bar{j}'] = f'{base_id}_bar{j}'
+        ids[f'{proto}_txt{j}'] = f'{base_id}_txt{j}'
+    requests = [{'duplicateObject': {'objectId': proto, 'objectIds': ids}}]
+    for j, line in enumerate(lines):
+        requests.append({'replaceAllText': {'containsText': {'text': _line_placeholder(j), 'matchCase': True},
+                                            'replaceText': line, 'pageObjectIds': [base_id]}})
+    return requests
+
+
+def template_deck_request_groups(setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]],
+                                 default_slide_id: str | None = None, backgrounds: list[str | None] | None = None,
+                                 inherited_pages: list[str] = ()):
+    """Template-mode counterpart of :func:`deck_request_groups` (prefix, one group per song, suffix)."""
+    backgrounds = backgrounds or resolve_backgrounds(songs_slides)
+    proto_bg = backgrounds[0]
+    counts = _layout_counts(songs_slides)
+    prefix = [{'deleteObject': {'objectId': default_slide_id}}] if default_slide_id else []
+    prefix += _inherited_background_requests(inherited_pages)
+    prefix += _make_title_slide(_TITLE_PROTO, _TITLE_PLACEHOLDER, proto_bg)
+    for n in counts:
+        prefix += iter_lyric_slide_requests(f'proto_l{n}', [_line_placeholder(j) for j in range(n)], proto_bg)
+    prefix += _duplicate_title('deck_title', setlist_title)
+    yield prefix
+    order = ['deck_title']
+    for sidx, (song_query, slides_content) in enumerate(songs_slides, start=1):
+        override = backgrounds[sidx] if backgrounds[sidx] != proto_bg else None
+        song_title, _ = split_title_artist(song_query)
+        group = _duplicate_title(f'song_title_{sidx}', song_title)
+        if override:
+            group.append(_background_request(f'song_title_{sidx}', override))
+        order.append(f'song_title_{sidx}')
+        for idx, lines in enumerate(slides_content):
+            group += _duplicate_lyric_slide(f'song{sidx}_slide{idx}', lines)
+            if override:
+                group.append(_background_request(f'song{sidx}_slide{idx}', override))
+            order.append(f'song{sidx}_slide{idx}')
+        yield group
+    yield ([{'updateSlidesPosition': {'slideObjectIds': order, 'insertionIndex': 0}}]
+           + [{'deleteObject': {'objectId': proto}} for proto in [_TITLE_PROTO] + [f'proto_l{n}' for n in counts]])
+
+
+def template_group_sizes(songs_slides: list[tuple[str, list[list[str]]]], default_slide_id: str | None = None,
+                         backgrounds: list[str | None] | None = None, inherited_pages: list[str] = ()) -> list[int]:
+    backgrounds = backgrounds or resolve_backgrounds(songs_slides)
+    has_bg = backgrounds[0] is not None
+    counts = _layout_counts(songs_slides)
+    sizes = [(1 if default_slide_id else 0) + len(inherited_pages) + 5 + has_bg
+             + sum(1 + has_bg + 7 * n for n in counts) + 2]
+    for (_, slides_content), bg in zip(songs_slides, backgrounds[1:]):
+        override = bool(bg) and bg != backgrounds[0]
+        sizes.append(2 + override + sum(1 + override + len(lines) for lines in slides_content))
+    return sizes + [1 + 1 + len(counts)]
+
+
+def _inheritable_pages(presentation: dict) -> list[str]:
+    """Master page(s) plus the BLANK layout that every generated slide is based on."""
+    pages = [m['objectId'] for m in presentation.get('masters', []) if m.get('objectId')]
+    pages += [layout['objectId'] for layout in presentation.get('layouts', [])
+              if (layout.get('layoutProperties') or {}).get('name') == 'BLANK']
+    return pages
+
+
+def write_deck(service, setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]], on_chunk=None,
+               mode: str | None = None, background_mode: str | None = None,
+               song_backgrounds: list[str | None] | None = None) -> str:
+    """
+    Create a presentation and fill it with the setlist; returns its edit URL.
+    ``mode`` is ``'direct'`` (every slide built from scratch) or
+    ``'template'`` (duplicate styled prototypes); defaults to SLIDES_BUILD_MODE.
+    ``background_mode`` is ``'slide'`` or ``'master'`` (defaults to
+    SLIDES_BACKGROUND_MODE); ``song_backgrounds`` optionally overrides the
+    background per song.
+    """
+    presentation = service.presentations().create(body={'title': setlist_title}).execute()
+    pres_id = presentation['presentationId']
+    default_id = presentation['slides'][0]['objectId']
+    inherited = _inheritable_pages(presentation) if (background_mode or SLIDES_BACKGROUND_MODE) == 'master' else []
+    backgrounds = resolve_backgrounds(songs_slides, song_backgrounds, inherit=bool(inherited))
+    if (mode or SLIDES_BUILD_MODE) == 'template':
+        groups = template_deck_request_groups(setlist_title, songs_slides, default_id, backgrounds, inherited)
+        sizes = template_group_sizes(songs_slides, default_id, backgrounds, inherited)
+    else:
+        groups = deck_request_groups(setlist_title, songs_slides, default_id, backgrounds, inherited)
+        sizes = deck_group_sizes(songs_slides, default_id, backgrounds, inherited)
+    submit_batch_updates(service, pres_id, groups, on_chunk=on_chunk, sizes=sizes)
+    return f"https://docs.google.com/presentation/d/{pres_id}/edit"
+
+
+def create_setlist_presentation(service, setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]],
+                                open_browser: bool = True) -> str | None:
+    """Write the deck and (unless ``open_browser`` is False) open it; returns its URL, or None on an API error."""
     try:
-        # create deck
-        presentation = service.presentations().create(body={'title': setlist_title}).execute()
-        pres_id = presentation['presentationId']
-        default_id = presentation['slides'][0]['objectId']
-        requests = [{'deleteObject': {'objectId': default_id}}]
-
-        # Deck title slide
-        requests += _make_title_slide('deck_title', setlist_title)
-
-        # For each song: a title slide then its lyric slides
-        for sidx, (song_query, slides_content) in enumerate(songs_slides, start=1):
-            song_title, _ = split_title_artist(song_query)
-            # Song title slide (title only)
-            requests += _make_title_slide(f'song_title_{sidx}', song_title)
-
-            # Lyric slides
-            for idx, lines in enumerate(slides_content):
-                base_id = f'song{sidx}_slide{idx}'
-                # blank slide + background
-                requests += [
-                    {'createSlide': {
-                        'objectId': base_id,
-                        'slideLayoutReference': {'predefinedLayout': 'BLANK'}
-                    }},
-                    {'updatePageProperties': {
-                        'objectId': base_id,
-                        'pageProperties': {
-                            'pageBackgroundFill': {
-                                'stretchedPictureFill': {'contentUrl': BACKGROUND_IMAGE_URL}
-                            }
-                        },
-                        'fields': 'pageBackgroundFill.stretchedPictureFill.contentUrl'
-                    }}
-                ]
-                # compute bar positions
-                bar_width = SLIDE_WIDTH * BOX_WIDTH_RATIO
-                x_off = (SLIDE_WIDTH - bar_width) / 2
-                count = len(lines)
-                total_h = count * BOX_HEIGHT + (count - 1) * BOX_SPACING
-                y_off = (SLIDE_HEIGHT - total_h) / 2
-
-                for j, line in enumerate(lines):
-                    bar_id = f'{base_id}_bar{j}'
-                    txt_id = f'{base_id}_txt{j}'
-                    y = y_off + j * (BOX_HEIGHT + BOX_SPACING)
-                    # shape + styling
-                    requests += [
-                        {'createShape': {
-                            'objectId': bar_id,
-                            'shapeType': 'RECTANGLE',
-                            'elementProperties': {
-                                'pageObjectId': base_id,
-                                'size': {
-                                    'width': {'magnitude': bar_width, 'unit': 'PT'},
-                                    'height': {'magnitude': BOX_HEIGHT, 'unit': 'PT'}
-                                },
-                                'transform': {
-                                    'scaleX': 1, 'scaleY': 1,
-                                    'translateX': x_off, 'translateY': y, 'unit': 'PT'
-                                }
-                            }
-                        }},
-                        {'updateShapeProperties': {
-                            'objectId': bar_id,
-                            'shapeProperties': {
-                                'shapeBackgroundFill': {
-                                    'solidFill': {
-                                        'color': {'rgbColor': {'red': 1, 'green': 1, 'blue': 1}},
-                                        'alpha': BOX_ALPHA
-                                    }
-                                },
-                                'outline': {'propertyState': 'NOT_RENDERED'}
-                            },
-                            'fields': 'shapeBackgroundFill.solidFill.color,shapeBackgroundFill.solidFill.alpha,outline.propertyState'
-                        }},
-                        {'createShape': {
-                            'objectId': txt_id,
-                            'shapeType': 'TEXT_BOX',
-                            'elementProperties': {
-                                'pageObjectId': base_id,
-                                'size': {
-                                    'width': {'magnitude': bar_width - 2 * TEXT_INSET, 'unit': 'PT'},
-                                    'height': {'magnitude': BOX_HEIGHT - 2 * TEXT_INSET, 'unit': 'PT'}
-                                },
-                                'transform': {
-                                    'scaleX': 1, 'scaleY': 1,
-                                    'translateX': x_off + TEXT_INSET,
-                                    'translateY': y + TEXT_INSET,
-                                    'unit': 'PT'
-                                }
-                            }
-                        }},
-                        {'updateShapeProperties': {
-                            'objectId': txt_id,
-                            'shapeProperties': {
-                                'shapeBackgroundFill': {'solidFill': {'alpha': 0}},
-                                'outline': {'propertyState': 'NOT_RENDERED'},
-                                'contentAlignment': 'MIDDLE'
-                            },
-                            'fields': 'shapeBackgroundFill.solidFill.alpha,outline.propertyState,contentAlignment'
-                        }},
-                        {'insertText': {'objectId': txt_id, 'insertionIndex': 0, 'text': line}},
-                        {'updateTextStyle': {
-                            'objectId': txt_id,
-                            'style': {
-                                'fontFamily': 'Calibri',
-                                'fontSize': {'magnitude': FONT_SIZE, 'unit': 'PT'},
-                                'foregroundColor': {'opaqueColor': {'rgbColor': {'red': 1, 'green': 1, 'blue': 1}}},
-                                'bold': False
-                            },
-                            'textRange': {'type': 'ALL'},
-                            'fields': 'fontFamily,fontSize,foregroundColor,bold'
-                        }},
-                        {'updateParagraphStyle': {
-                            'objectId': txt_id,
-                            'style': {'alignment': 'CENTER', 'lineSpacing': 100},
-                            'textRange': {'type': 'ALL'},
-                            'fields': 'alignment,lineSpacing'
-                        }}
-                    ]
-
-        service.presentations().batchUpdate(
-            presentationId=pres_id,
-            body={'requests': requests}
-        ).execute()
-        print(f"✅ Presentation ready: https://docs.google.com/presentation/d/{pres_id}/edit")
-
-        url = f"https://docs.google.com/presentation/d/{pres_id}/edit"
+        url = write_deck(service, setlist_title, songs_slides)
+        print(f"✅ Presentation ready: {url}")
+        if not open_browser:
+            return url
 
         # ── magic to open Chrome ──
-        import sys, subprocess, webbrowser
+        import subprocess, webbrowser
 
         try:
             if sys.platform.startswith('darwin'):  # macOS
@@ -389,66 +1097,80 @@ def create_setlist_presentation(service, setlist_title: str, songs_slides: list[
                 webbrowser.open_new_tab(url)
         except Exception as e:
             print(f"⚠️  Couldn’t auto-launch Chrome: {e}")
+        return url
 
     except HttpError as e:
         print(f"An error occurred: {e}")
+        return None
+
+
+_TITLE_SIZE = {
+    'height': {'magnitude': 50, 'unit': 'PT'},
+    'width': {'magnitude': SLIDE_WIDTH, 'unit': 'PT'}
+}
+_TITLE_TRANSFORM = {
+    'scaleX': 1, 'scaleY': 1,
+    'translateX': 0,
+    'translateY': (SLIDE_HEIGHT - 33) / 2,
+    'unit': 'PT'
+}
+_TITLE_TEXT_STYLE = {
+    'fontFamily': 'Calibri',
+    'fontSize': {'magnitude': 33, 'unit': 'PT'},
+    'foregroundColor': {'opaqueColor': _WHITE}
+}
+_TITLE_PARAGRAPH_STYLE = {'alignment': 'CENTER'}
 
 
-def _make_title_slide(obj_id: str, text: str) -> list[dict]:
+def pptx_layout() -> dict:
+    """This deck's layout in the form :func:`pptx_writer.write_pptx` takes."""
+    return {
+        'slide_size': (SLIDE_WIDTH, SLIDE_HEIGHT),
+        'title': (_TITLE_SIZE, _TITLE_TRANSFORM, _TITLE_TEXT_STYLE['fontSize']['magnitude']),
+        'line_geometry': _line_geometry,
+        'box_alpha': BOX_ALPHA,
+        'font_size': FONT_SIZE,
+        'background': BACKGROUND_IMAGE_URL,
+    }
+
+
+def write_pptx_deck(path: str, setlist_title: str, songs_slides: list[tuple[str, list[list[str]]]],
+                    song_backgrounds: list[str | None] | None = None) -> str:
+    """
+    Same deck as :func:`write_deck`, written to a local ``.pptx`` at ``path``
+    (see pptx_writer.py); returns the path.
+    """
+    songs = [(split_title_artist(query)[0], slides) for query, slides in songs_slides]
+    return write_pptx(path, setlist_title, songs, pptx_layout(), resolve_backgrounds(songs_slides, song_backgrounds))
+
+
+def _make_title_slide(obj_id: str, text: str, background=_DECK_BACKGROUND) -> list[dict]:
     """
     Helper to generate the 6 requests needed for a big title slide
+    (5 when ``background`` is None and the page inherits its background)
     """
     txt = text.upper()
-    return [
-        {'createSlide': {
-            'objectId': obj_id,
-            'slideLayoutReference': {'predefinedLayout': 'BLANK'}
-        }},
-        {'updatePageProperties': {
-            'objectId': obj_id,
-            'pageProperties': {
-                'pageBackgroundFill': {
-                    'stretchedPictureFill': {'contentUrl': BACKGROUND_IMAGE_URL}
-                }
-            },
-            'fields': 'pageBackgroundFill.stretchedPictureFill.contentUrl'
-        }},
+    box_id = f'{obj_id}_box'
+    requests = [{'createSlide': {'objectId': obj_id, 'slideLayoutReference': _BLANK_LAYOUT}}]
+    if background is not None:
+        requests.append(_background_request(obj_id, background))
+    return requests + [
         {'createShape': {
-            'objectId': f'{obj_id}_box',
+            'objectId': box_id,
             'shapeType': 'TEXT_BOX',
-            'elementProperties': {
-                'pageObjectId': obj_id,
-                'size': {
-                    'height': {'magnitude': 50, 'unit': 'PT'},
-                    'width': {'magnitude': SLIDE_WIDTH, 'unit': 'PT'}
-                },
-                'transform': {
-                    'scaleX': 1, 'scaleY': 1,
-                    'translateX': 0,
-                    'translateY': (SLIDE_HEIGHT - 33) / 2,
-                    'unit': 'PT'
-                }
-            }
-        }},
-        {'insertText': {
-            'objectId': f'{obj_id}_box',
-            'insertionIndex': 0,
-            'text': txt
+            'elementProperties': {'pageObjectId': obj_id, 'size': _TITLE_SIZE, 'transform': _TITLE_TRANSFORM}
         }},
+        {'insertText': {'objectId': box_id, 'insertionIndex': 0, 'text': txt}},
         {'updateTextStyle': {
-            'objectId': f'{obj_id}_box',
-            'style': {
-                'fontFamily': 'Calibri',
-                'fontSize': {'magnitude': 33, 'unit': 'PT'},
-                'foregroundColor': {'opaqueColor': {'rgbColor': {'red': 1, 'green': 1, 'blue': 1}}}
-            },
-            'textRange': {'type': 'ALL'},
+            'objectId': box_id,
+            'style': _TITLE_TEXT_STYLE,
+            'textRange': _ALL_TEXT,
             'fields': 'fontFamily,fontSize,foregroundColor'
         }},
         {'updateParagraphStyle': {
-            'objectId': f'{obj_id}_box',
-            'textRange': {'type': 'ALL'},
-            'style': {'alignment': 'CENTER'},
+            'objectId': box_id,
+            'textRange': _ALL_TEXT,
+            'style': _TITLE_PARAGRAPH_STYLE,
             'fields': 'alignment'
         }}
     ]
@@ -468,32 +1190,81 @@ if __name__ == '__main__':
         nargs='*',
         help='Song names (you can add "– artist" or "- artist" for accuracy)'
     )
+    parser.add_argument(
+        '--auto',
+        action='store_true',
+        help='Never prompt: reuse the previous choice for a song, else pick the top worship score '
+             '(implied when stdin is not a terminal)'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=CLI_FETCH_JOBS,
+        help=f'Songs to fetch concurrently (default: {CLI_FETCH_JOBS})'
+    )
+    parser.add_argument(
+        '--skip-missing',
+        action='store_true',
+        help='Leave out songs whose lyrics cannot be found instead of failing'
+    )
+    parser.add_argument(
+        '--no-open',
+        action='store_true',
+        help="Don't open the finished deck in a browser"
+    )
+    parser.add_argument(
+        '--pptx',
+        metavar='FILE',
+        help='Write the deck to a local PowerPoint file instead of Google Slides (no sign-in needed)'
+    )
     args = parser.parse_args()
+    # Nobody can answer a prompt in a pipeline or cron job.
+    auto = args.auto or not sys.stdin.isatty()
 
     # build the list of song queries
     if args.file:
         if not os.path.exists(args.file):
             raise FileNotFoundError(f'Setlist file not found: {args.file}')
-        with open(args.file, encoding='utf-8') as f:
-            songs = [line.strip() for line in f if line.strip()]
+        songs = read_setlist(args.file)
     else:
         songs = args.songs
 
     if not songs:
         parser.error('No songs specified. Pass song names or use -f setlist.txt')
 
-    # fetch & format every song
-    songs_slides = []
-    for song in songs:
-        raw = fetch_lyrics_from_genius(song)
-        slides = format_lyrics(raw)
-        songs_slides.append((song, slides))
+    def fetch_song(song: str):
+        return format_lyrics(fetch_lyrics_from_genius(song, auto=auto))
+
+    # Fetch & format every song concurrently, and authenticate with Google
+    # alongside them instead of after them.  Results are collected in
+    # setlist order, so the deck order never depends on which fetch wins.
+    songs_slides, missing = [], []
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs) + 1) as pool:
+        # a local .pptx needs no Google sign-in at all
+        auth = pool.submit(authenticate) if not args.pptx else None
+        fetches = [pool.submit(fetch_song, song) for song in songs]
+        for song, fetch in zip(songs, fetches):
+            try:
+                songs_slides.append((song, fetch.result()))
+            except Exception as e:
+                print(f'❌ {song}: {e}')
+                missing.append(song)
+        svc = auth.result() if auth else None
 
-    svc = authenticate()
+    if missing and not args.skip_missing:
+        print(f'No deck created: {len(missing)} song(s) not found (use --skip-missing to leave them out).')
+        sys.exit(1)
+    if not songs_slides:
+        print('No deck created: none of the songs were found.')
+        sys.exit(1)
     # include today's date in the deck title
     today = datetime.datetime.now()
     # build an “h:mmam/pm” string without %-I
     time_str = today.strftime('%I:%M%p').lstrip('0').lower()
     deck_title = f"{today.strftime('%B')} {today.day} Setlist Generated at {time_str}"
 
-    create_setlist_presentation(svc, deck_title, songs_slides)
\ No newline at end of file
+    if args.pptx:
+        start = time.perf_counter()
+        print(f"✅ Deck written: {write_pptx_deck(args.pptx, deck_title, songs_slides)} ({time.perf_counter() - start:.2f}s)")
+    elif not create_setlist_presentation(svc, deck_title, songs_slides, open_browser=not args.no_open):
+        sys.exit(1)
\ No newline at end of file
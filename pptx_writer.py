@@ -0,0 +1,326 @@
+"""
+Offline PowerPoint backend.
+
+Writes a setlist deck straight to a ``.pptx`` file (OOXML: a zip of small
+templated XML parts) from the same slide lists the Google Slides writer
+takes, so a deck needs no OAuth, network or API quota.  The layout is
+passed in by the caller: ``lyrics_to_slides_improved.write_pptx_deck``
+hands over the Slides writer's own (the same title slides, stacked
+translucent bars from ``_line_geometry`` and ``BOX_ALPHA``, and Calibri
+``FONT_SIZE`` lyrics), so this module depends on nothing but the stdlib.
+
+The deck background is set once on the slide master and inherited by every
+slide, so the image is stored once however long the deck is; songs with a
+background override carry their own.  Background images are downloaded the
+first time they are used and kept in ``PPTX_BACKGROUND_CACHE``, so later
+decks are built fully offline; ``PPTX_BACKGROUND_PATH`` points at a local
+image instead.  Without an image the slides are plain black.
+
+    write_pptx('setlist.pptx', 'June 8 Setlist', [(song_title, slides), ...], layout, backgrounds)
+"""
+
+import datetime
+import hashlib
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+
+PPTX_BACKGROUND_PATH = os.getenv('PPTX_BACKGROUND_PATH', '')
+PPTX_BACKGROUND_CACHE = os.getenv(
+    'PPTX_BACKGROUND_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'background_cache')
+)
+PPTX_DOWNLOAD_TIMEOUT = float(os.getenv('PPTX_DOWNLOAD_TIMEOUT', '15'))
+
+EMU_PER_PT = 12700
+_IMAGE_TYPES = ((b'\xff\xd8\xff', 'jpeg', 'image/jpeg'), (b'\x89PNG', 'png', 'image/png'),
+                (b'GIF8', 'gif', 'image/gif'))
+# characters XML 1.0 cannot carry at all
+_XML_INVALID_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_NS = ('xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+       'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+       'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"')
+_XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+_CT = 'application/vnd.openxmlformats-officedocument.'
+_GROUP = ('<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr><a:xfrm>'
+          '<a:off x="0" y="0"/><a:ext cx="0" cy="0"/><a:chOff x="0" y="0"/><a:chExt cx="0" cy="0"/></a:xfrm></p:grpSpPr>')
+
+
+# ── Background images ──
+
+def _image_type(data: bytes):
+    for magic, ext, mime in _IMAGE_TYPES:
+        if data.startswith(magic):
+            return ext, mime
+    return None
+
+
+def load_background(url: str | None) -> bytes | None:
+    """
+    Image bytes for a background URL: from the local cache, else downloaded
+    once and cached.  Local paths are read directly.  None when unavailable.
+    """
+    if not url:
+        return None
+    if os.path.isfile(url):
+        with open(url, 'rb') as f:
+            return f.read()
+    cached = os.path.join(PPTX_BACKGROUND_CACHE, hashlib.blake2b(url.encode(), digest_size=16).hexdigest())
+    if os.path.exists(cached):
+        with open(cached, 'rb') as f:
+            return f.read()
+    try:
+        import requests
+        resp = requests.get(url, timeout=PPTX_DOWNLOAD_TIMEOUT)
+        resp.raise_for_status()
+        data = resp.content
+    except Exception as e:
+        print(f'⚠️  Couldn’t download background {url}: {e}')
+        return None
+    if not _image_type(data):
+        print(f'⚠️  Background {url} is not a JPEG, PNG or GIF image')
+        return None
+    try:
+        os.makedirs(PPTX_BACKGROUND_CACHE, exist_ok=True)
+        with open(f'{cached}.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(f'{cached}.tmp', cached)
+    except OSError:
+        pass
+    return data
+
+
+def _deck_background_source(layout: dict) -> str | None:
+    return PPTX_BACKGROUND_PATH or layout['background']
+
+
+# ── XML parts ──
+
+def _emu(pt: float) -> int:
+    return int(round(pt * EMU_PER_PT))
+
+
+def _xfrm(size: dict, transform: dict) -> str:
+    return (f'<a:xfrm><a:off x="{_emu(transform["translateX"])}" y="{_emu(transform["translateY"])}"/>'
+            f'<a:ext cx="{_emu(size["width"]["magnitude"])}" cy="{_emu(size["height"]["magnitude"])}"/></a:xfrm>')
+
+
+def _bar(shape_id: int, size: dict, transform: dict, alpha: float) -> str:
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Bar {shape_id}"/><p:cNvSpPr/><p:nvPr/></p:nvSpPr>'
+            f'<p:spPr>{_xfrm(size, transform)}<a:prstGeom prst="rect"><a:avLst/></a:prstGeom>'
+            f'<a:solidFill><a:srgbClr val="FFFFFF"><a:alpha val="{int(round(alpha * 100000))}"/></a:srgbClr></a:solidFill>'
+            '<a:ln><a:noFill/></a:ln></p:spPr></p:sp>')
+
+
+def _text_box(shape_id: int, size: dict, transform: dict, text: str, font_size: float) -> str:
+    text = escape(_XML_INVALID_RE.sub('', text))
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Text {shape_id}"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+            f'<p:spPr>{_xfrm(size, transform)}<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/>'
+            '<a:ln><a:noFill/></a:ln></p:spPr><p:txBody><a:bodyPr wrap="square" lIns="0" tIns="0" rIns="0" bIns="0" '
+            'anchor="ctr"><a:noAutofit/></a:bodyPr><a:lstStyle/><a:p><a:pPr algn="ctr"><a:lnSpc><a:spcPct val="100000"/>'
+            f'</a:lnSpc></a:pPr><a:r><a:rPr lang="en-US" sz="{int(round(font_size * 100))}" b="0" dirty="0"><a:solidFill>'
+            '<a:srgbClr val="FFFFFF"/></a:solidFill><a:latin typeface="Calibri"/></a:rPr>'
+            f'<a:t>{text}</a:t></a:r></a:p></p:txBody></p:sp>')
+
+
+def _background(rel_id: str | None) -> str:
+    fill = (f'<a:blipFill dpi="0" rotWithShape="1"><a:blip r:embed="{rel_id}"/><a:srcRect/><a:stretch><a:fillRect/>'
+            '</a:stretch></a:blipFill>' if rel_id else '<a:solidFill><a:srgbClr val="000000"/></a:solidFill>')
+    return f'<p:bg><p:bgPr>{fill}<a:effectLst/></p:bgPr></p:bg>'
+
+
+def _slide(shapes: str, background: str = '') -> str:
+    return (f'{_XML_HEAD}<p:sld {_NS}><p:cSld>{background}<p:spTree>{_GROUP}{shapes}</p:spTree></p:cSld>'
+            '<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>')
+
+
+def _title_shapes(text: str, layout: dict) -> str:
+    size, transform, font_size = layout['title']
+    return _text_box(2, size, transform, text.upper(), font_size)
+
+
+def _lyric_shapes(lines: list[str], layout: dict) -> str:
+    out = []
+    for j, (line, (bar_size, bar_tf, txt_size, txt_tf)) in enumerate(zip(lines, layout['line_geometry'](len(lines)))):
+        out.append(_bar(2 + 2 * j, bar_size, bar_tf, layout['box_alpha']))
+        out.append(_text_box(3 + 2 * j, txt_size, txt_tf, line, layout['font_size']))
+    return ''.join(out)
+
+
+def _rels(rels: list[tuple[str, str]]) -> str:
+    body = ''.join(f'<Relationship Id="rId{i}" Type="{_REL}{kind}" Target="{target}"/>'
+                   for i, (kind, target) in enumerate(rels, start=1))
+    return f'{_XML_HEAD}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{body}</Relationships>'
+
+
+_ROOT_RELS = (
+    f'{_XML_HEAD}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_REL}officeDocument" Target="ppt/presentation.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" '
+    'Target="docProps/core.xml"/>'
+    f'<Relationship Id="rId3" Type="{_REL}extended-properties" Target="docProps/app.xml"/></Relationships>'
+)
+
+_LAYOUT = (
+    f'{_XML_HEAD}<p:sldLayout {_NS} type="blank" preserve="1"><p:cSld name="Blank"><p:spTree>{_GROUP}</p:spTree>'
+    '</p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>'
+)
+
+
+def _master(background: str) -> str:
+    return (f'{_XML_HEAD}<p:sldMaster {_NS}><p:cSld>{background}<p:spTree>{_GROUP}</p:spTree></p:cSld>'
+            '<p:clrMap bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" accent3="accent3" '
+            'accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" folHlink="folHlink"/>'
+            '<p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/></p:sldLayoutIdLst>'
+            '<p:txStyles><p:titleStyle/><p:bodyStyle/><p:otherStyle/></p:txStyles></p:sldMaster>')
+
+
+def _scheme_colors() -> str:
+    colors = [('dk1', '000000'), ('lt1', 'FFFFFF'), ('dk2', '44546A'), ('lt2', 'E7E6E6'), ('accent1', '4472C4'),
+              ('accent2', 'ED7D31'), ('accent3', 'A5A5A5'), ('accent4', 'FFC000'), ('accent5', '5B9BD5'),
+              ('accent6', '70AD47'), ('hlink', '0563C1'), ('folHlink', '954F72')]
+    return ''.join(f'<a:{name}><a:srgbClr val="{val}"/></a:{name}>' for name, val in colors)
+
+
+_SOLID = '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+_THEME = (
+    f'{_XML_HEAD}<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" name="Setlist">'
+    f'<a:themeElements><a:clrScheme name="Setlist">{_scheme_colors()}</a:clrScheme>'
+    '<a:fontScheme name="Setlist"><a:majorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/>'
+    '</a:majorFont><a:minorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:minorFont>'
+    f'</a:fontScheme><a:fmtScheme name="Setlist"><a:fillStyleLst>{_SOLID * 3}</a:fillStyleLst>'
+    '<a:lnStyleLst>' + '<a:ln w="6350"><a:solidFill><a:schemeClr val="phClr"/></a:solidFill></a:ln>' * 3 + '</a:lnStyleLst>'
+    '<a:effectStyleLst>' + '<a:effectStyle><a:effectLst/></a:effectStyle>' * 3 + '</a:effectStyleLst>'
+    f'<a:bgFillStyleLst>{_SOLID * 3}</a:bgFillStyleLst></a:fmtScheme></a:themeElements></a:theme>'
+)
+
+_PRES_PROPS = f'{_XML_HEAD}<p:presentationPr {_NS}/>'
+_VIEW_PROPS = f'{_XML_HEAD}<p:viewPr {_NS}/>'
+_TABLE_STYLES = (f'{_XML_HEAD}<a:tblStyleLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+                 'def="{5C22544A-7EE6-4342-B048-85BDC9FD1C3A}"/>')
+
+
+def _presentation(slide_count: int, slide_size: tuple) -> str:
+    # rId1 master, rId2 theme, rId3..: slides (see _presentation_rels)
+    ids = ''.join(f'<p:sldId id="{256 + i}" r:id="rId{3 + i}"/>' for i in range(slide_count))
+    return (f'{_XML_HEAD}<p:presentation {_NS} saveSubsetFonts="1">'
+            '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+            f'<p:sldIdLst>{ids}</p:sldIdLst><p:sldSz cx="{_emu(slide_size[0])}" cy="{_emu(slide_size[1])}"/>'
+            '<p:notesSz cx="6858000" cy="9144000"/></p:presentation>')
+
+
+def _presentation_rels(slide_count: int) -> str:
+    return _rels([('slideMaster', 'slideMasters/slideMaster1.xml'), ('theme', 'theme/theme1.xml')]
+                 + [('slide', f'slides/slide{i}.xml') for i in range(1, slide_count + 1)]
+                 + [('presProps', 'presProps.xml'), ('viewProps', 'viewProps.xml'), ('tableStyles', 'tableStyles.xml')])
+
+
+def _content_types(slide_count: int, image_types: list[tuple[str, str]]) -> str:
+    defaults = {'rels': 'application/vnd.openxmlformats-package.relationships+xml', 'xml': 'application/xml'}
+    defaults.update(image_types)
+    overrides = [('/ppt/presentation.xml', 'presentationml.presentation.main+xml'),
+                 ('/ppt/slideMasters/slideMaster1.xml', 'presentationml.slideMaster+xml'),
+                 ('/ppt/slideLayouts/slideLayout1.xml', 'presentationml.slideLayout+xml'),
+                 ('/ppt/theme/theme1.xml', 'theme+xml'),
+                 ('/ppt/presProps.xml', 'presentationml.presProps+xml'),
+                 ('/ppt/viewProps.xml', 'presentationml.viewProps+xml'),
+                 ('/ppt/tableStyles.xml', 'presentationml.tableStyles+xml'),
+                 ('/docProps/app.xml', 'extended-properties+xml')]
+    overrides += [(f'/ppt/slides/slide{i}.xml', 'presentationml.slide+xml') for i in range(1, slide_count + 1)]
+    return (f'{_XML_HEAD}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            + ''.join(f'<Default Extension="{ext}" ContentType="{mime}"/>' for ext, mime in defaults.items())
+            + ''.join(f'<Override PartName="{part}" ContentType="{_CT}{kind}"/>' for part, kind in overrides)
+            + '<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+            '</Types>')
+
+
+def _core(title: str) -> str:
+    now = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return (f'{_XML_HEAD}<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+            f'<dc:title>{escape(_XML_INVALID_RE.sub("", title))}</dc:title>'
+            f'<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+            f'<dcterms:modified xsi:type="dcterms:W3CDTF">{now}</dcterms:modified></cp:coreProperties>')
+
+
+def _app(slide_count: int) -> str:
+    return (f'{_XML_HEAD}<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+            f'<Application>Setlist Slides</Application><Slides>{slide_count}</Slides></Properties>')
+
+
+# ── Deck writer ──
+
+def iter_deck_slides(setlist_title: str, songs: list[tuple[str, list[list[str]]]], layout: dict,
+                     backgrounds: list[str | None]):
+    """Yield ``(shapes xml, background url)`` per slide, in the Slides writer's order."""
+    yield _title_shapes(setlist_title, layout), backgrounds[0]
+    for (song_title, slides_content), background in zip(songs, backgrounds[1:]):
+        yield _title_shapes(song_title, layout), background
+        for lines in slides_content:
+            yield _lyric_shapes(lines, layout), background
+
+
+def write_pptx(path: str, setlist_title: str, songs: list[tuple[str, list[list[str]]]], layout: dict,
+               backgrounds: list[str | None] | None = None) -> str:
+    """
+    Write the deck to ``path`` as a PowerPoint file and return the path.
+
+    ``songs`` holds ``(song title, lyric slides)`` pairs.  ``layout`` has
+    ``slide_size`` (width, height), ``title`` (size, transform, font size),
+    ``line_geometry`` (line count -> per-line bar/text geometry),
+    ``box_alpha``, ``font_size`` and the deck ``background`` URL, with
+    sizes and transforms in the Slides API's point units.  ``backgrounds``
+    gives the deck title's and each song's background URL; None or the
+    deck background means the slide inherits the master's.
+    """
+    # deck background on the master; None marks slides that inherit it
+    backgrounds = [None if bg == layout['background'] else bg
+                   for bg in (backgrounds or [None] * (len(songs) + 1))]
+    # background source -> (media part name, (ext, mime)), or None when it can't be loaded
+    media: dict = {}
+    images: dict[str, bytes] = {}
+    for source in [_deck_background_source(layout)] + [bg for bg in backgrounds[1:] if bg is not None]:
+        if source not in media:
+            data = load_background(source)
+            kind = _image_type(data) if data else None
+            media[source] = (f'image{len(images) + 1}.{kind[0]}', kind) if kind else None
+            if kind:
+                images[media[source][0]] = data
+    deck_image = media[_deck_background_source(layout)]
+    slide_count = 1 + sum(1 + len(slides_content) for _, slides_content in songs)
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+        z.writestr('[Content_Types].xml', _content_types(slide_count, [v[1] for v in media.values() if v]))
+        for n, (shapes, background) in enumerate(iter_deck_slides(setlist_title, songs, layout, backgrounds), start=1):
+            rels = [('slideLayout', '../slideLayouts/slideLayout1.xml')]
+            image = media.get(background) if background is not None else None
+            if image:
+                # a song's own background; otherwise the master's shows through
+                rels.append(('image', f'../media/{image[0]}'))
+            z.writestr(f'ppt/slides/slide{n}.xml', _slide(shapes, _background('rId2') if image else ''))
+            z.writestr(f'ppt/slides/_rels/slide{n}.xml.rels', _rels(rels))
+        z.writestr('_rels/.rels', _ROOT_RELS)
+        z.writestr('docProps/core.xml', _core(setlist_title))
+        z.writestr('docProps/app.xml', _app(slide_count))
+        z.writestr('ppt/presentation.xml', _presentation(slide_count, layout['slide_size']))
+        z.writestr('ppt/_rels/presentation.xml.rels', _presentation_rels(slide_count))
+        z.writestr('ppt/presProps.xml', _PRES_PROPS)
+        z.writestr('ppt/viewProps.xml', _VIEW_PROPS)
+        z.writestr('ppt/tableStyles.xml', _TABLE_STYLES)
+        z.writestr('ppt/theme/theme1.xml', _THEME)
+        z.writestr('ppt/slideMasters/slideMaster1.xml', _master(_background('rId3' if deck_image else None)))
+        z.writestr('ppt/slideMasters/_rels/slideMaster1.xml.rels',
+                   _rels([('slideLayout', '../slideLayouts/slideLayout1.xml'), ('theme', '../theme/theme1.xml')]
+                         + ([('image', f'../media/{deck_image[0]}')] if deck_image else [])))
+        z.writestr('ppt/slideLayouts/slideLayout1.xml', _LAYOUT)
+        z.writestr('ppt/slideLayouts/_rels/slideLayout1.xml.rels',
+                   _rels([('slideMaster', '../slideMasters/slideMaster1.xml')]))
+        for name, data in images.items():
+            # images are already compressed
+            z.writestr(zipfile.ZipInfo(f'ppt/media/{name}', date_time=(1980, 1, 1, 0, 0, 0)), data,
+                       compress_type=zipfile.ZIP_STORED)
+    return path
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Setlist batch generation
+========================
+
+Builds one Google Slides deck per setlist file in a single run, instead of
+one ``lyrics_to_slides_improved.py -f`` invocation (and one authentication
+and cold lyric fetch) per file.
+
+* One Slides service and one lyrics cache are shared by every deck.
+* Songs are de-duplicated across setlists (by their normalised query) and
+  each distinct song is fetched once, ``--jobs`` at a time.  Selection is
+  always automatic: the previous choice for a query, else the top worship
+  score (see ``--auto`` in the CLI).
+* A deck starts building as soon as its own songs are in, at most
+  ``--decks`` at a time so the Slides write quota is respected; quota
+  (429) responses are retried with backoff as usual.
+* Every deck gets a line in a JSON Lines manifest: setlist file, title,
+  URL, songs, missing songs, and fetch / build / total seconds.
+
+With ``--pptx DIR`` each deck is written to ``DIR/<setlist>.pptx`` instead
+(see pptx_writer.py) and nothing signs in to Google.
+
+Spool mode (``--spool DIR``) keeps running and picks up every ``*.txt``
+dropped into ``DIR``, moving it to ``DIR/done`` or ``DIR/failed`` once its
+deck is built, with the manifest at ``DIR/manifest.jsonl``.
+
+Usage::
+
+    python setlist_batch.py setlists/             # every *.txt in a folder
+    python setlist_batch.py north.txt south.txt --manifest decks.jsonl
+    python setlist_batch.py --spool ~/Setlists/inbox
+"""
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lyrics_library import search_key
+from lyrics_to_slides_improved import (
+    CLI_FETCH_JOBS, authenticate, fetch_lyrics_from_genius, format_lyrics, read_setlist, write_deck, write_pptx_deck,
+)
+
+
+# Decks written at once.  Each deck is a create, a get and one or two
+# batchUpdates, so two builders stay well inside the default Slides quota of
+# 60 writes per minute per user.
+SETLIST_DECK_WORKERS = int(os.getenv('SETLIST_DECK_WORKERS', '2'))
+SETLIST_MANIFEST = os.getenv('SETLIST_MANIFEST', 'manifest.jsonl')
+# Spool polling interval, and how long a file must sit unchanged before it is
+# read (so a half-copied setlist is never picked up).
+SETLIST_SPOOL_INTERVAL = float(os.getenv('SETLIST_SPOOL_INTERVAL', '5'))
+SETLIST_SPOOL_SETTLE = float(os.getenv('SETLIST_SPOOL_SETTLE', '2'))
+SETLIST_EXTENSIONS = ('.txt',)
+
+
+def setlist_files(paths: list[str]) -> list[str]:
+    """Expand folders into their setlist files (sorted); files are kept as given."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(SETLIST_EXTENSIONS)
+                                and os.path.isfile(os.path.join(path, name))))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError(f'Setlist file not found: {path}')
+    return files
+
+
+def deck_title(path: str, now: datetime.datetime | None = None) -> str:
+    """'north_campus.txt' -> 'North Campus – June 8'."""
+    now = now or datetime.datetime.now()
+    name = os.path.splitext(os.path.basename(path))[0].replace('_', ' ').replace('-', ' ').strip()
+    return f"{' '.join(w[:1].upper() + w[1:] for w in name.split())} – {now.strftime('%B')} {now.day}"
+
+
+class SetlistBatch:
+    """
+    One batch run: a shared song fetch stage feeding a bounded deck builder.
+
+    ``fetch`` (query -> slides) defaults to the CLI's automatic Genius/library
+    lookup and ``service`` to the shared Slides service; both can be swapped
+    for testing or reuse.  With ``pptx_dir`` decks are written there as
+    PowerPoint files and the Slides service is never used.
+    """
+
+    def __init__(self, jobs: int = CLI_FETCH_JOBS, decks: int = SETLIST_DECK_WORKERS,
+                 skip_missing: bool = False, fetch=None, service=None, pptx_dir: str | None = None):
+        self.jobs = max(1, jobs); self.decks = max(1, decks)
+        self.skip_missing = skip_missing; self.pptx_dir = pptx_dir
+        self.fetch = fetch or (lambda query: format_lyrics(fetch_lyrics_from_genius(query, auto=True)))
+        self._service = service
+        self._service_lock = threading.Lock()
+
+    def service(self):
+        with self._service_lock:
+            if self._service is None:
+                self._service = authenticate()
+            return self._service
+
+    def run(self, files: list[str], on_deck=None) -> list[dict]:
+        """
+        Build a deck per setlist file; returns one manifest record per file, in
+        order.  ``on_deck(record)`` is called as each deck finishes.
+        """
+        start = time.perf_counter()
+        setlists = []
+        for path in files:
+            try:
+                setlists.append((path, read_setlist(path), None))
+            except (OSError, UnicodeDecodeError) as e:
+                setlists.append((path, [], str(e)))
+        unique = {search_key(q) or q for _, songs, _ in setlists for q in songs}
+        print(f'{len(setlists)} setlist(s), {sum(len(s) for _, s, _ in setlists)} songs, {len(unique)} distinct')
+
+        with ThreadPoolExecutor(max_workers=self.jobs + 1, thread_name_prefix='fetch') as fetchers, \
+                ThreadPoolExecutor(max_workers=self.decks, thread_name_prefix='deck') as builders:
+            # authenticate alongside the fetches, once for the whole batch
+            auth = fetchers.submit(self.service) if not self.pptx_dir else None
+            songs: dict[str, object] = {}
+            for _, queries, _ in setlists:
+                for q in queries:
+                    key = search_key(q) or q
+                    if key not in songs:
+                        songs[key] = fetchers.submit(self.fetch, q)
+            decks = [builders.submit(self._build, path, queries, error, songs, auth, start, on_deck)
+                     for path, queries, error in setlists]
+            records = [d.result() for d in decks]
+        print(f'{sum(1 for r in records if r["url"])}/{len(records)} deck(s) built in {time.perf_counter() - start:.1f}s')
+        return records
+
+    def _build(self, path: str, queries: list[str], error: str | None, songs: dict, auth, start: float, on_deck) -> dict:
+        record = {'setlist': path, 'title': deck_title(path), 'url': None, 'songs': len(queries), 'missing': [],
+                  'fetch_seconds': 0.0, 'build_seconds': 0.0, 'seconds': 0.0, 'error': error}
+        if error is None and not queries:
+            record['error'] = 'empty setlist'
+        elif error is None:
+            songs_slides = []
+            for q in queries:
+                try:
+                    songs_slides.append((q, songs[search_key(q) or q].result()))
+                except Exception as e:
+                    print(f'❌ {os.path.basename(path)}: {q}: {e}')
+                    record['missing'].append(q)
+            # time from the start of the batch until this deck's last song was in
+            record['fetch_seconds'] = round(time.perf_counter() - start, 3)
+            if record['missing'] and not self.skip_missing:
+                record['error'] = f'{len(record["missing"])} song(s) not found'
+            elif not songs_slides:
+                record['error'] = 'none of the songs were found'
+            else:
+                build_start = time.perf_counter()
+                try:
+                    if self.pptx_dir:
+                        name = os.path.splitext(os.path.basename(path))[0] + '.pptx'
+                        record['url'] = write_pptx_deck(os.path.join(self.pptx_dir, name), record['title'], songs_slides)
+                    else:
+                        record['url'] = write_deck(auth.result(), record['title'], songs_slides)
+                except Exception as e:
+                    record['error'] = str(e)
+                record['build_seconds'] = round(time.perf_counter() - build_start, 3)
+        record['seconds'] = round(time.perf_counter() - start, 3)
+        print(f"{'✅' if record['url'] else '❌'} {record['title']}: {record['url'] or record['error']}")
+        if on_deck is not None:
+            on_deck(record)
+        return record
+
+
+def append_manifest(path: str, record: dict) -> None:
+    """Append one deck record to the JSON Lines manifest."""
+    line = json.dumps(dict(record, finished_at=datetime.datetime.now().isoformat(timespec='seconds')), ensure_ascii=False)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+
+
+def _signature(path: str) -> tuple | None:
+    """(mtime, size) of a settled file, None while it may still be being written (or is gone)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size) if time.time() - st.st_mtime >= SETLIST_SPOOL_SETTLE else None
+
+
+def run_spool(spool_dir: str, batch: SetlistBatch, manifest: str, interval: float = SETLIST_SPOOL_INTERVAL) -> None:
+    """Process setlists dropped into ``spool_dir`` until interrupted."""
+    done_dir = os.path.join(spool_dir, 'done'); failed_dir = os.path.join(spool_dir, 'failed')
+    os.makedirs(done_dir, exist_ok=True); os.makedirs(failed_dir, exist_ok=True)
+    lock = threading.Lock()
+    # Files handled but still in the spool (they couldn't be moved), by the
+    # (mtime, size) they had: skipped until they change, so a stuck file is
+    # built once instead of on every poll.
+    handled: dict[str, tuple] = {}
+    picked: dict[str, tuple] = {}
+
+    def on_deck(record: dict):
+        path = record['setlist']
+        with lock:
+            append_manifest(manifest, record)
+            target = done_dir if record['url'] else failed_dir
+            try:
+                shutil.move(path, os.path.join(target, os.path.basename(path)))
+            except OSError as e:
+                print(f"⚠️  Couldn’t move {path}: {e}; it won’t be built again until it changes")
+                handled[path] = picked[path]
+
+    print(f'Watching {spool_dir} for setlists (Ctrl-C to stop)…')
+    while True:
+        picked.clear()
+        for f in setlist_files([spool_dir]):
+            sig = _signature(f)
+            if sig is not None and handled.get(f) != sig:
+                picked[f] = sig
+        for f in [f for f in handled if not os.path.exists(f)]:
+            del handled[f]
+        if picked:
+            batch.run(list(picked), on_deck)
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a Google Slides deck for each of many setlists.')
+    parser.add_argument('paths', nargs='*', help='Setlist files (one song per line) or folders of *.txt setlists')
+    parser.add_argument('--spool', metavar='DIR', help='Keep running and build a deck for every setlist dropped into DIR')
+    parser.add_argument('--manifest', help=f'JSON Lines file to append deck records to (default: {SETLIST_MANIFEST}, '
+                                           'or DIR/manifest.jsonl with --spool)')
+    parser.add_argument('-j', '--jobs', type=int, default=CLI_FETCH_JOBS,
+                        help=f'Songs to fetch concurrently (default: {CLI_FETCH_JOBS})')
+    parser.add_argument('--decks', type=int, default=SETLIST_DECK_WORKERS,
+                        help=f'Decks to write concurrently (default: {SETLIST_DECK_WORKERS})')
+    parser.add_argument('--pptx', metavar='DIR', help='Write each deck to DIR/<setlist>.pptx instead of Google Slides')
+    parser.add_argument('--skip-missing', action='store_true',
+                        help='Leave out songs that cannot be found instead of failing their deck')
+    args = parser.parse_args()
+    if bool(args.paths) == bool(args.spool):
+        parser.error('Pass setlist files/folders, or --spool DIR (not both)')
+
+    if args.pptx:
+        os.makedirs(args.pptx, exist_ok=True)
+    batch = SetlistBatch(jobs=args.jobs, decks=args.decks, skip_missing=args.skip_missing, pptx_dir=args.pptx)
+    if args.spool:
+        try:
+            run_spool(args.spool, batch, args.manifest or os.path.join(args.spool, 'manifest.jsonl'))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    files = setlist_files(args.paths)
+    if not files:
+        parser.error('No setlist files found')
+    manifest = args.manifest or SETLIST_MANIFEST
+    records = batch.run(files, lambda record: append_manifest(manifest, record))
+    print(f'Manifest: {manifest}')
+    if not all(r['url'] for r in records):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+In-memory trigram index of every song title/artist we know about.
+
+Songs come from three places: Genius suggestions the web UI has resolved,
+the lyrics cache, and the local lyrics library.  A query is split into
+character trigrams of its :func:`lyrics_library.search_key` form and matched
+against per-trigram posting sets, so typos and partial words still hit and a
+lookup over tens of thousands of songs takes about a millisecond.
+
+The index grows incrementally as songs are added and is persisted as a small
+gzip'd JSON snapshot (``SONG_INDEX_PATH``) so it is warm at startup.
+"""
+
+import gzip
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+
+from lyrics_library import is_library_url, search_key
+from worship_scoring import WORSHIP_SCORER
+
+
+SONG_INDEX_PATH = os.getenv(
+    'SONG_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'song_index.json.gz')
+)
+SONG_INDEX_SIZE = int(os.getenv('SONG_INDEX_SIZE', '50000'))
+# Share of the query's trigrams a song must contain to be returned.
+SONG_INDEX_MIN_SIMILARITY = float(os.getenv('SONG_INDEX_MIN_SIMILARITY', '0.5'))
+# Most candidates probed against a query's common trigrams.
+SONG_INDEX_CANDIDATES = int(os.getenv('SONG_INDEX_CANDIDATES', '256'))
+
+
+def trigrams(text: str, partial: bool = False) -> set[str]:
+    """
+    Character trigrams of the normalised text, padded so word starts weigh more.
+    ``partial`` leaves the end unpadded, for a query whose last word may still be half-typed.
+    """
+    key = f"  {search_key(text)}{'' if partial else ' '}"
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class SongIndex:
+    """Trigram postings over song entries; at most ``size`` songs, oldest dropped first.
+
+    Entries are dicts with ``title``, ``artist``, ``url``, ``gid`` and
+    ``thumbnail``, keyed by URL (or by normalised title/artist without one).
+    Each song's ``scorer`` rank (worship relevance) is computed once, in a
+    batch, when it is added, so lookups never score candidates.
+    """
+
+    def __init__(self, path: str = SONG_INDEX_PATH, size: int = SONG_INDEX_SIZE, scorer=WORSHIP_SCORER):
+        self.path = path; self.size = size; self.scorer = scorer
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._scores: dict[str, float] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(title: str, artist: str, url: str | None) -> str:
+        return url or f'{search_key(title)}|{search_key(artist)}'
+
+    def add(self, title: str, artist: str = '', url: str | None = None, gid=None, thumbnail: str | None = None):
+        self.add_many([{'title': title, 'artist': artist, 'url': url, 'gid': gid, 'thumbnail': thumbnail}])
+
+    def add_many(self, songs):
+        songs = [s for s in songs if (s.get('title') or '').strip()]
+        if not songs:
+            return
+        scores = self.scorer.score_batch((s['title'], s.get('artist') or '') for s in songs) if self.scorer else [0] * len(songs)
+        for s, score in zip(songs, scores):
+            self._add(s['title'].strip(), (s.get('artist') or '').strip(), s.get('url'), s.get('gid'), s.get('thumbnail'), score)
+
+    def _add(self, title: str, artist: str, url: str | None, gid, thumbnail: str | None, score):
+        key = self._key(title, artist, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # known song: keep its postings, just fill in anything new
+                changed = (gid and not entry['gid']) or (thumbnail and not entry['thumbnail'])
+                if changed:
+                    entry['gid'] = entry['gid'] or gid; entry['thumbnail'] = entry['thumbnail'] or thumbnail
+                    self._dirty = True
+                self._entries.move_to_end(key); return
+            self._entries[key] = {'title': title, 'artist': artist, 'url': url, 'gid': gid, 'thumbnail': thumbnail}
+            self._scores[key] = score
+            grams = self._grams[key] = trigrams(f'{title} {artist}')
+            for g in grams:
+                self._postings.setdefault(g, set()).add(key)
+            while len(self._entries) > self.size:
+                self._evict(next(iter(self._entries)))
+            self._dirty = True
+
+    def _evict(self, key: str):
+        del self._entries[key]; self._scores.pop(key, None)
+        for g in self._grams.pop(key, ()):
+            keys = self._postings.get(g)
+            if keys is not None:
+                keys.discard(key)
+                if not keys: del self._postings[g]
+
+    def search(self, query: str, limit: int = 5) -> list[dict]:
+        """
+        Best matches for ``query``: by trigram similarity, then by worship score
+        (higher first), then shorter titles.  Library songs win ties, and the same
+        title/artist is only returned once.
+        """
+        qgrams = trigrams(query, partial=True)
+        if len(qgrams) < 3:
+            return []
+        # too few trigrams to be fuzzy about: a short query must match all of them
+        need = len(qgrams) if len(qgrams) <= 4 else max(1, int(SONG_INDEX_MIN_SIMILARITY * len(qgrams) + 0.999))
+        with self._lock:
+            postings = sorted((self._postings.get(g, ()) for g in qgrams), key=len)
+            # A match holds at least `need` query trigrams, so it must appear in one of
+            # the len - need + 1 rarest postings; the common ones are only probed.  Long
+            # queries (title plus artist) stop at the 8 rarest, which keeps common
+            # artist trigrams from flooding the candidates.
+            split = min(len(postings) - need + 1, 8)
+            hits = Counter()
+            for keys in postings[:split]:
+                hits.update(keys)
+            if len(hits) > SONG_INDEX_CANDIDATES:
+                # only the songs sharing the most rare trigrams are worth probing further
+                hits = Counter(dict(hits.most_common(SONG_INDEX_CANDIDATES)))
+            for keys in postings[split:]:
+                if len(keys) < len(hits):
+                    for key in keys:
+                        if key in hits: hits[key] += 1
+                else:
+                    for key in hits:
+                        if key in keys: hits[key] += 1
+            by_shared: dict[int, list[str]] = {}
+            for key, shared in hits.items():
+                if shared >= need: by_shared.setdefault(shared, []).append(key)
+            out, seen = [], set()
+            for shared in sorted(by_shared, reverse=True):
+                ranked = sorted(by_shared[shared], key=lambda k: (-self._scores[k], not is_library_url(self._entries[k]['url']),
+                                                                  len(self._entries[k]['title'])))
+                for e in map(self._entries.__getitem__, ranked):
+                    ident = (search_key(e['title']), search_key(e['artist']))
+                    if ident in seen:
+                        continue
+                    seen.add(ident); out.append(dict(e))
+                    if len(out) >= limit:
+                        return out
+        return out
+
+    # -- snapshot ----------------------------------------------------------
+
+    def load(self) -> int:
+        """Add the songs from the snapshot file, if there is one; returns how many were read."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                rows = json.load(f).get('songs', [])
+        except (OSError, ValueError):
+            return 0
+        self.add_many({'title': title, 'artist': artist, 'url': url, 'gid': gid, 'thumbnail': thumbnail}
+                      for title, artist, url, gid, thumbnail in rows)
+        self._dirty = False
+        return len(rows)
+
+    def save(self, force: bool = False) -> bool:
+        """Write the snapshot (atomically) if anything changed since the last save."""
+        if not self.path or not (self._dirty or force):
+            return False
+        with self._lock:
+            # library songs are re-read from the library at startup, so a deleted file never lingers
+            rows = [[e['title'], e['artist'], e['url'], e['gid'], e['thumbnail']]
+                    for e in self._entries.values() if not is_library_url(e['url'])]
+            self._dirty = False
+        tmp = f'{self.path}.tmp'
+        try:
+            with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump({'version': 1, 'songs': rows}, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError:
+            self._dirty = True
+            return False
+        return True
+
+
+SONG_INDEX = SongIndex()
@@ -0,0 +1,123 @@
+"""
+Worship-relevance scoring shared by the CLI and the web UI.
+
+A candidate's score is the summed weight of the worship keywords found
+anywhere in its "title artist" text (case-insensitive substring match, each
+keyword counted once), plus an optional weight for its exact artist.  With
+the default weights every keyword is worth 1, the score the CLI has always
+shown next to its matches.
+
+Keywords are compiled into a bit table.  Because a keyword never spans
+whitespace, a text's keywords are the union of its words' keywords, and each
+distinct word's keyword bitmask is computed once and memoised; titles and
+artists repeat the same words constantly, so scoring is mostly dictionary
+lookups.  :meth:`WorshipScorer.score_batch` scores a whole candidate list in
+one pass.  (Keywords that contain spaces can span words, so they are checked
+with a plain substring test per text.)
+
+Weights can be configured in ``.env``:
+
+    WORSHIP_KEYWORDS=worship,praise,jesus:2,hillsong     # keyword[:weight], replaces the defaults
+    WORSHIP_ARTISTS=Hillsong UNITED:2,Bethel Music:1     # artist:weight, exact (case-insensitive) match
+"""
+
+import os
+
+
+DEFAULT_WORSHIP_KEYWORDS = [
+    'worship', 'praise', 'christ', 'jesus', 'god', 'hillsong', 'bethel',
+    'church', 'faith', 'grace', 'redeemer', 'lord', 'holy', 'gospel',
+    'alive', 'blessing', 'spirit', 'hope', 'saved',
+]
+
+
+def _number(text: str):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def parse_weights(spec: str) -> dict:
+    """'a, b:2, c:0.5' -> {'a': 1, 'b': 2, 'c': 0.5}; names are lower-cased."""
+    weights = {}
+    for item in (spec or '').split(','):
+        name, _, weight = item.partition(':')
+        name = name.strip().lower()
+        if name:
+            weights[name] = _number(weight) if weight.strip() else 1
+    return weights
+
+
+class WorshipScorer:
+    """Precompiled keyword/artist scorer.
+
+    ``keywords`` maps keyword -> weight (a plain list weighs each keyword 1);
+    ``artists`` maps an exact artist name -> extra weight.
+    """
+
+    MAX_MEMO_WORDS = 200_000
+
+    def __init__(self, keywords=DEFAULT_WORSHIP_KEYWORDS, artists: dict | None = None):
+        if not isinstance(keywords, dict):
+            keywords = {kw: 1 for kw in keywords}
+        self.keywords = {kw.lower(): w for kw, w in keywords.items() if kw}
+        self.artists = {a.lower(): w for a, w in (artists or {}).items() if a}
+        bits = [(1 << i, kw) for i, kw in enumerate(self.keywords)]
+        self._weights = [w for w in self.keywords.values()]
+        self._word_masks: dict[str, int] = {}
+        self._mask_scores: dict[int, float] = {0: 0}
+        # Single-word keywords go through the per-word memo; keywords with spaces
+        # can span words, so they get a plain substring test on the whole text.
+        self._bits = [(bit, kw) for bit, kw in bits if not any(ch.isspace() for ch in kw)]
+        self._phrases = [(bit, kw) for bit, kw in bits if any(ch.isspace() for ch in kw)]
+
+    @classmethod
+    def from_env(cls) -> 'WorshipScorer':
+        keywords = parse_weights(os.getenv('WORSHIP_KEYWORDS', '')) or DEFAULT_WORSHIP_KEYWORDS
+        return cls(keywords, parse_weights(os.getenv('WORSHIP_ARTISTS', '')))
+
+    def _word_mask(self, word: str) -> int:
+        mask = 0
+        for bit, kw in self._bits:
+            if kw in word: mask |= bit
+        if len(self._word_masks) >= self.MAX_MEMO_WORDS: self._word_masks.clear()
+        self._word_masks[word] = mask
+        return mask
+
+    def _mask(self, text: str) -> int:
+        """Bitmask of the keywords found in already lower-cased ``text``."""
+        get = self._word_masks.get; mask = 0
+        for word in text.split():
+            m = get(word)
+            mask |= self._word_mask(word) if m is None else m
+        for bit, kw in self._phrases:
+            if kw in text: mask |= bit
+        return mask
+
+    def _mask_score(self, mask: int):
+        score = self._mask_scores.get(mask)
+        if score is None:
+            score = self._mask_scores[mask] = sum(w for i, w in enumerate(self._weights) if mask >> i & 1)
+        return score
+
+    def score(self, title: str, artist: str):
+        """Score one candidate."""
+        total = self._mask_score(self._mask(f'{title or ""} {artist or ""}'.lower()))
+        return total + self.artists.get((artist or '').strip().lower(), 0) if self.artists else total
+
+    def score_batch(self, candidates) -> list:
+        """Score an iterable of ``(title, artist)`` pairs in one pass."""
+        mask_of = self._mask; mask_score = self._mask_score
+        artists = self.artists
+        scores = []
+        for title, artist in candidates:
+            total = mask_score(mask_of(f'{title or ""} {artist or ""}'.lower()))
+            scores.append(total + artists.get((artist or '').strip().lower(), 0) if artists else total)
+        return scores
+
+    def score_hits(self, hits) -> list:
+        """Batch-score Genius ``search_songs`` hits (dicts with a ``result``)."""
+        results = [hit.get('result', {}) for hit in hits]
+        return self.score_batch((r.get('title', ''), (r.get('primary_artist') or {}).get('name', '')) for r in results)
+
+
+WORSHIP_SCORER = WorshipScorer.from_env()